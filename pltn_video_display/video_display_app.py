@@ -16,6 +16,15 @@ from pathlib import Path
 from enum import Enum
 from typing import Optional, Dict
 import argparse
+import traceback
+import os
+
+# Optional fast JSON decoder for the state file (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # Fix Windows console encoding untuk emoji support
 if sys.platform == 'win32':
@@ -86,6 +95,50 @@ LEVEL_BUTTONS = {
     "PRESSURE_UP", "PRESSURE_DOWN"
 }
 
+# ============================================
+# mpv Player Configuration (built once)
+# ============================================
+
+# mpv command for Wayland (video path appended per play)
+MPV_ARGS = (
+    'mpv',
+    '--fs',                      # Fullscreen
+    '--no-osd-bar',             # No on-screen display
+    '--no-input-default-bindings',  # Disable keyboard
+    '--really-quiet',           # Minimal output
+    '--vo=gpu',                 # Video output: GPU (Wayland compatible)
+    '--hwdec=auto',             # Hardware decode (4K support)
+    '--gpu-context=wayland',    # Use Wayland context
+)
+MPV_ARGS_LOOP = MPV_ARGS[:1] + ('--loop=inf',) + MPV_ARGS[1:]
+
+# Wayland environment for mpv
+MPV_ENV = {
+    'DISPLAY': ':0',
+    'WAYLAND_DISPLAY': 'wayland-0',
+    'XDG_RUNTIME_DIR': '/run/user/1000'
+}
+
+# ============================================
+# Manual Guide Steps (lookup table)
+# ============================================
+
+# (state_key, threshold, text) - step selesai jika state[state_key] >= threshold
+# state_key None = step terakhir (tidak ada syarat)
+MANUAL_GUIDE_STEPS = (
+    ("pressure", 45, ["Raise Pressure to 45 bar", "Press PRESSURE UP button"]),
+    ("pump_tertiary", 1, ["Start Tertiary Pump", "Press PUMP TERTIARY ON"]),
+    ("pump_secondary", 1, ["Start Secondary Pump", "Press PUMP SECONDARY ON"]),
+    ("pump_primary", 1, ["Start Primary Pump", "Press PUMP PRIMARY ON"]),
+    ("pressure", 140, ["Raise Pressure to 140 bar", "Continue pressing PRESSURE UP"]),
+    ("safety_rod", 100, ["Withdraw Safety Rod to 100%", "Press SAFETY ROD UP"]),
+    ("shim_rod", 50, ["Withdraw Shim Rod to 50%", "Press SHIM ROD UP"]),
+    ("regulating_rod", 50, ["Withdraw Regulating Rod to 50%", "Press REGULATING ROD UP"]),
+    (None, 0, ["Normal Operation Achieved!", "System is generating power"]),
+)
+
+MANUAL_GUIDE_COMPLETE_TEXT = ["Simulation Complete!", "Press RESET to restart"]
+
 
 
 class VideoDisplayApp:
@@ -136,12 +189,25 @@ class VideoDisplayApp:
         
         self.last_state = {}
         
+        # Asset paths (resolved once - absolute path for mpv)
+        self.assets_dir = Path(__file__).resolve().parent / "assets"
+        self.video_path = str(self.assets_dir / "penjelasan.mp4")
+        try:
+            # Satu listdir untuk semua asset (bukan stat per file)
+            self.asset_files = set(os.listdir(self.assets_dir))
+        except FileNotFoundError:
+            self.asset_files = set()
+        
         # Video player (mpv subprocess)
         self.video_process = None
         self.current_video = None
+        self.video_watchdog_interval = 2.0  # Seconds between mpv liveness checks
+        self.last_video_check = 0.0
         
         # Display mode
         self.display_mode = DisplayMode.IDLE
+        self.min_mode_dwell = 3.0  # Minimum seconds before switching mode again
+        self.mode_enter_time = time.monotonic() - self.min_mode_dwell
         
         # Fonts - Enhanced for 4K display with better hierarchy
         # Scale fonts based on display resolution
@@ -260,10 +326,10 @@ class VideoDisplayApp:
     def load_logos(self):
         """Load BRIN and Poltek logos from assets folder"""
         try:
-            logo_path_brin = Path(__file__).parent / "assets" / "logo-brin.png"
-            logo_path_poltek = Path(__file__).parent / "assets" / "logo-poltek.png"
+            logo_path_brin = self.assets_dir / "logo-brin.png"
+            logo_path_poltek = self.assets_dir / "logo-poltek.png"
             
-            if logo_path_brin.exists():
+            if logo_path_brin.name in self.asset_files:
                 logo_img = pygame.image.load(str(logo_path_brin))
                 # Scale for IDLE mode (large)
                 self.logo_brin = pygame.transform.smoothscale(logo_img, self.logo_size_large)
@@ -271,7 +337,7 @@ class VideoDisplayApp:
             else:
                 print(f"   ⚠️  BRIN logo not found: {logo_path_brin}")
             
-            if logo_path_poltek.exists():
+            if logo_path_poltek.name in self.asset_files:
                 logo_img = pygame.image.load(str(logo_path_poltek))
                 # Scale for IDLE mode (large)
                 self.logo_poltek = pygame.transform.smoothscale(logo_img, self.logo_size_large)
@@ -329,8 +395,13 @@ class VideoDisplayApp:
             if not self.state_file.exists():
                 return {}
             
-            with open(self.state_file, 'r') as f:
-                state = json.load(f)
+            if ORJSON_AVAILABLE:
+                # orjson parses bytes directly (no text decode step)
+                with open(self.state_file, 'rb') as f:
+                    state = orjson.loads(f.read())
+            else:
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
             
             # Check if state has changed significantly (user interaction)
             if not self.user_has_interacted:
@@ -499,33 +570,13 @@ class VideoDisplayApp:
                 print("   💡 Create video file or use placeholder")
             return
         
-        # Build mpv command for Wayland
-        cmd = [
-            'mpv',
-            '--fs',                      # Fullscreen
-            '--no-osd-bar',             # No on-screen display
-            '--no-input-default-bindings',  # Disable keyboard
-            '--really-quiet',           # Minimal output
-            '--vo=gpu',                 # Video output: GPU (Wayland compatible)
-            '--hwdec=auto',             # Hardware decode (4K support)
-            '--gpu-context=wayland',    # Use Wayland context
-            video_path
-        ]
-        
-        if loop:
-            cmd.insert(1, '--loop=inf')
+        # mpv command for Wayland (prebuilt argv)
+        cmd = [*(MPV_ARGS_LOOP if loop else MPV_ARGS), video_path]
         
         try:
-            # Set Wayland environment for mpv
-            env = {
-                'DISPLAY': ':0',
-                'WAYLAND_DISPLAY': 'wayland-0',
-                'XDG_RUNTIME_DIR': '/run/user/1000'
-            }
-            
             self.video_process = subprocess.Popen(
                 cmd,
-                env=env,
+                env=MPV_ENV,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.DEVNULL
             )
@@ -543,15 +594,38 @@ class VideoDisplayApp:
     def stop_video(self):
         """Stop current video"""
         if self.video_process:
-            self.video_process.terminate()
-            try:
-                self.video_process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                self.video_process.kill()
+            # mpv exits promptly on SIGTERM; kill quickly if it doesn't
+            # (stdin 'q' not usable: --no-input-default-bindings)
+            if self.video_process.poll() is None:
+                self.video_process.terminate()
+                try:
+                    self.video_process.wait(timeout=0.5)
+                except subprocess.TimeoutExpired:
+                    self.video_process.kill()
+                    self.video_process.wait()
             self.video_process = None
             self.current_video = None
             print("⏹️  Video stopped")
     
+    def check_video_watchdog(self):
+        """
+        Watchdog: restart mpv if it exited while video should be playing
+        (mpv runs with --loop=inf, so any exit means crash/killed)
+        """
+        now = time.monotonic()
+        if now - self.last_video_check < self.video_watchdog_interval:
+            return
+        self.last_video_check = now
+        
+        if self.video_process and self.video_process.poll() is not None:
+            exit_code = self.video_process.returncode
+            video_path = self.current_video
+            print(f"⚠️  mpv exited unexpectedly (code {exit_code}) - restarting")
+            self.video_process = None
+            self.current_video = None
+            if video_path:
+                self.play_video(video_path, loop=True)
+    
     def draw_idle_screen(self):
         """Display idle/intro screen - Optimized for 4K display"""
         self.screen.fill(self.COLOR_BG)
@@ -803,57 +877,20 @@ class VideoDisplayApp:
     
     def get_current_step_instruction(self, state: Dict) -> list:
         """Get instruction text for current step"""
-        steps = [
-            {
-                "text": ["Raise Pressure to 45 bar", "Press PRESSURE UP button"],
-                "check": lambda s: s.get("pressure", 0) >= 45
-            },
-            {
-                "text": ["Start Tertiary Pump", "Press PUMP TERTIARY ON"],
-                "check": lambda s: s.get("pump_tertiary", 0) >= 1
-            },
-            {
-                "text": ["Start Secondary Pump", "Press PUMP SECONDARY ON"],
-                "check": lambda s: s.get("pump_secondary", 0) >= 1
-            },
-            {
-                "text": ["Start Primary Pump", "Press PUMP PRIMARY ON"],
-                "check": lambda s: s.get("pump_primary", 0) >= 1
-            },
-            {
-                "text": ["Raise Pressure to 140 bar", "Continue pressing PRESSURE UP"],
-                "check": lambda s: s.get("pressure", 0) >= 140
-            },
-            {
-                "text": ["Withdraw Safety Rod to 100%", "Press SAFETY ROD UP"],
-                "check": lambda s: s.get("safety_rod", 0) >= 100
-            },
-            {
-                "text": ["Withdraw Shim Rod to 50%", "Press SHIM ROD UP"],
-                "check": lambda s: s.get("shim_rod", 0) >= 50
-            },
-            {
-                "text": ["Withdraw Regulating Rod to 50%", "Press REGULATING ROD UP"],
-                "check": lambda s: s.get("regulating_rod", 0) >= 50
-            },
-            {
-                "text": ["Normal Operation Achieved!", "System is generating power"],
-                "check": lambda s: True
-            }
-        ]
+        steps = MANUAL_GUIDE_STEPS
         
         # Check if current step completed
         if self.current_step < len(steps):
-            step = steps[self.current_step]
-            if step["check"](state):
+            key, threshold, _ = steps[self.current_step]
+            if key is None or state.get(key, 0) >= threshold:
                 self.current_step += 1
                 if self.test_mode:
                     print(f"✅ Step {self.current_step} completed!")
         
         if self.current_step < len(steps):
-            return steps[self.current_step]["text"]
+            return steps[self.current_step][2]
         else:
-            return ["Simulation Complete!", "Press RESET to restart"]
+            return MANUAL_GUIDE_COMPLETE_TEXT
     
     def draw_progress_bar_enhanced(self, state: Dict, y_start: int):
         """Draw enhanced parameter progress bars for 4K display"""
@@ -989,6 +1026,23 @@ class VideoDisplayApp:
             
             pygame.display.flip()
     
+    def _set_display_mode(self, mode: DisplayMode):
+        """Switch display mode and record when it was entered"""
+        self.display_mode = mode
+        self.mode_enter_time = time.monotonic()
+    
+    def _mode_dwell_elapsed(self) -> bool:
+        """True if current display mode has been held for min_mode_dwell"""
+        return (time.monotonic() - self.mode_enter_time) >= self.min_mode_dwell
+    
+    def _draw_current_mode(self, state: Dict):
+        """Redraw current display mode without evaluating transitions"""
+        if self.display_mode == DisplayMode.MANUAL_GUIDE:
+            self.draw_manual_guide(state)
+        elif self.display_mode == DisplayMode.IDLE:
+            self.draw_idle_screen()
+        # AUTO_VIDEO: mpv handles fullscreen itself
+    
     def update(self):
         """Main update loop with improved mode transition logic"""
         state = self.read_simulation_state()
@@ -1009,16 +1063,15 @@ class VideoDisplayApp:
                 # Force IDLE mode
                 if self.display_mode != DisplayMode.IDLE:
                     self.stop_video()
-                    self.display_mode = DisplayMode.IDLE
+                    self._set_display_mode(DisplayMode.IDLE)
                 self.draw_idle_screen()
                 return
             elif self.mock_mode == "auto":
                 # Force AUTO mode
                 if self.display_mode != DisplayMode.AUTO_VIDEO:
                     print("🎬 Switching to AUTO VIDEO mode")
-                    video_path = str(Path(__file__).parent / "assets" / "penjelasan.mp4")
-                    self.play_video(video_path, loop=True)
-                    self.display_mode = DisplayMode.AUTO_VIDEO
+                    self.play_video(self.video_path, loop=True)
+                    self._set_display_mode(DisplayMode.AUTO_VIDEO)
                 
                 # Show overlay in test mode
                 self.draw_video_playing_overlay()
@@ -1028,7 +1081,7 @@ class VideoDisplayApp:
                 if self.display_mode != DisplayMode.MANUAL_GUIDE:
                     print("📋 Switching to MANUAL GUIDE mode")
                     self.stop_video()
-                    self.display_mode = DisplayMode.MANUAL_GUIDE
+                    self._set_display_mode(DisplayMode.MANUAL_GUIDE)
                     self.current_step = 0
                 
                 self.draw_manual_guide(state)
@@ -1041,7 +1094,7 @@ class VideoDisplayApp:
                 print("⚠️  No state file - showing IDLE")
             if self.display_mode != DisplayMode.IDLE:
                 self.stop_video()
-                self.display_mode = DisplayMode.IDLE
+                self._set_display_mode(DisplayMode.IDLE)
                 self.user_has_interacted = False  # Reset on no state
             self.draw_idle_screen()
             return
@@ -1050,6 +1103,13 @@ class VideoDisplayApp:
         auto_running = state.get("auto_running", False)
         emergency = state.get("emergency", False)
         
+        # Hysteresis: tahan mode tampilan minimal min_mode_dwell detik agar state
+        # yang berosilasi di batas threshold tidak restart mpv berulang kali.
+        # Emergency selalu langsung diproses.
+        if not emergency and not self._mode_dwell_elapsed():
+            self._draw_current_mode(state)
+            return
+        
         # Check if simulation was RESET (pressure back to 0, all parameters reset)
         current_pressure = state.get("pressure", 0)
         current_rods = (state.get("safety_rod", 0) + 
@@ -1064,7 +1124,7 @@ class VideoDisplayApp:
             if self.display_mode != DisplayMode.IDLE:
                 print("🔄 RESET detected - returning to IDLE")
                 self.stop_video()
-                self.display_mode = DisplayMode.IDLE
+                self._set_display_mode(DisplayMode.IDLE)
                 self.user_has_interacted = False
                 self.auto_complete_time = None
             self.draw_idle_screen()
@@ -1075,7 +1135,7 @@ class VideoDisplayApp:
             # Auto simulation just finished - go to MANUAL, not IDLE!
             print("🏁 Auto simulation completed - switching to MANUAL")
             self.stop_video()
-            self.display_mode = DisplayMode.MANUAL_GUIDE
+            self._set_display_mode(DisplayMode.MANUAL_GUIDE)
             self.user_has_interacted = True  # Enable manual mode immediately
             self.auto_complete_time = None
             self.current_step = 0
@@ -1086,7 +1146,7 @@ class VideoDisplayApp:
             if self.display_mode != DisplayMode.IDLE:
                 print("🚨 Emergency detected - returning to IDLE")
                 self.stop_video()
-                self.display_mode = DisplayMode.IDLE
+                self._set_display_mode(DisplayMode.IDLE)
                 self.user_has_interacted = False
                 self.auto_complete_time = None
             self.draw_idle_screen()
@@ -1096,15 +1156,15 @@ class VideoDisplayApp:
         if mode == "auto" and auto_running:
             if self.display_mode != DisplayMode.AUTO_VIDEO:
                 print(f"🎬 Switching to AUTO VIDEO mode")
-                # Use video from assets folder (production ready)
-                video_path = str(Path(__file__).parent / "assets" / "penjelasan.mp4")
-                self.play_video(video_path, loop=True)
-                self.display_mode = DisplayMode.AUTO_VIDEO
+                # Use video from assets folder (production ready, cached path)
+                self.play_video(self.video_path, loop=True)
+                self._set_display_mode(DisplayMode.AUTO_VIDEO)
                 self.auto_complete_time = None  # Reset completion timer
                 self.user_has_interacted = False  # Reset interaction flag
             
             # Video is playing via mpv - don't draw anything
             # (mpv handles fullscreen itself)
+            self.check_video_watchdog()
             return
         
         # MODE 3: MANUAL - Show guide if user interacted or after auto complete
@@ -1112,7 +1172,7 @@ class VideoDisplayApp:
             if self.display_mode != DisplayMode.MANUAL_GUIDE:
                 print(f"📋 Switching to MANUAL GUIDE mode (user pressed button)")
                 self.stop_video()
-                self.display_mode = DisplayMode.MANUAL_GUIDE
+                self._set_display_mode(DisplayMode.MANUAL_GUIDE)
                 self.current_step = 0
             
             self.draw_manual_guide(state)
@@ -1121,7 +1181,7 @@ class VideoDisplayApp:
         else:
             if self.display_mode != DisplayMode.IDLE:
                 self.stop_video()
-                self.display_mode = DisplayMode.IDLE
+                self._set_display_mode(DisplayMode.IDLE)
             self.draw_idle_screen()
     
     def run(self):
@@ -1151,7 +1211,13 @@ class VideoDisplayApp:
             self.update()
             
             # 30 FPS sufficient for UI updates
-            clock.tick(30)
+            # Saat mpv memutar video (production), pygame tidak menggambar apa-apa,
+            # cukup pompa event + baca state -> turunkan ke 10 FPS (hemat CPU)
+            if (self.display_mode == DisplayMode.AUTO_VIDEO and
+                    self.video_process is not None and not self.test_mode):
+                clock.tick(10)
+            else:
+                clock.tick(30)
         
         # Cleanup
         self.stop_video()
@@ -1182,7 +1248,6 @@ def main():
         print("\n⚠️  Interrupted by user")
     except Exception as e:
         print(f"❌ Error: {e}")
-        import traceback
         traceback.print_exc()
 
 
@@ -13,6 +13,7 @@ Alarm Conditions:
 
 import logging
 import threading
+import queue
 import time
 
 # Try to import GPIO library
@@ -85,6 +86,12 @@ class BuzzerAlarm:
         self.alarm_lock = threading.Lock()
         self.stop_alarm_flag = False
         self.emergency_beep_active = False  # Flag to protect emergency beep from being cleared
+        self.alarm_changed = threading.Event()  # Wakes alarm thread on change/stop
+        
+        # Single worker for short warnings (procedure/interlock) - latest request wins
+        self._warning_queue = queue.Queue(maxsize=1)
+        self._warning_thread = threading.Thread(target=self._warning_worker, daemon=True)
+        self._warning_thread.start()
         
         # Initialize GPIO
         if GPIO_AVAILABLE:
@@ -108,20 +115,32 @@ class BuzzerAlarm:
                 if self.current_alarm != self.ALARM_NONE:
                     tone_config = self.ALARM_TONES[self.current_alarm]
                     logger.info(f"🔊 ALARM: {tone_config['name']} (simulated)")
-                time.sleep(1.0)
+                self.alarm_changed.wait(1.0)  # Returns early on cleanup
+                self.alarm_changed.clear()
             return
         
         try:
             # Create PWM instance
             pwm = GPIO.PWM(self.buzzer_pin, 1000)  # Start with 1kHz (will change)
+            pwm_on = False
+            pwm_freq = None
             
             while not self.stop_alarm_flag:
+                self.alarm_changed.clear()
+                # Re-check after clear(): cleanup() may have set the flag and
+                # the event just before it, and that wake-up is now erased
+                if self.stop_alarm_flag:
+                    break
                 with self.alarm_lock:
                     alarm_type = self.current_alarm
                 
                 if alarm_type == self.ALARM_NONE:
-                    pwm.stop()
-                    time.sleep(0.1)
+                    if pwm_on:
+                        pwm.stop()
+                        pwm_on = False
+                    # Idle: block until an alarm is set (no 100ms polling);
+                    # the timeout is a backstop so a lost wake-up can't hang us
+                    self.alarm_changed.wait(1.0)
                     continue
                 
                 # Get tone configuration
@@ -131,18 +150,22 @@ class BuzzerAlarm:
                 
                 # Play alarm pattern
                 for i, duration in enumerate(pattern):
-                    if self.stop_alarm_flag:
-                        break
-                    
                     if i % 2 == 0:
                         # Beep ON
-                        pwm.ChangeFrequency(freq)
-                        pwm.start(50)  # 50% duty cycle
-                    else:
+                        if pwm_freq != freq:
+                            pwm.ChangeFrequency(freq)
+                            pwm_freq = freq
+                        if not pwm_on:
+                            pwm.start(50)  # 50% duty cycle
+                            pwm_on = True
+                    elif pwm_on:
                         # Beep OFF (pause)
                         pwm.stop()
+                        pwm_on = False
                     
-                    time.sleep(duration)
+                    # Interruptible wait: new alarm/stop takes effect immediately
+                    if self.alarm_changed.wait(duration):
+                        break
             
             # Stop PWM on exit
             pwm.stop()
@@ -163,6 +186,7 @@ class BuzzerAlarm:
                 new_alarm = self.ALARM_TONES[alarm_type]['name']
                 
                 self.current_alarm = alarm_type
+                self.alarm_changed.set()  # Wake alarm thread (pattern or idle wait)
                 
                 if alarm_type != self.ALARM_NONE:
                     logger.warning(f"🔊 ALARM ACTIVATED: {new_alarm}")
@@ -241,29 +265,51 @@ class BuzzerAlarm:
                 logger.info(f"✅ Emergency beep completed ({duration}s)")
             except Exception as e:
                 self.emergency_beep_active = False  # Release on error
-                logger.error(f"❌ Emergency beep error: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"❌ Emergency beep error: {e}")
         
         # Run in separate thread (non-blocking)
         beep_thread = threading.Thread(target=beep_for_duration, daemon=True)
         beep_thread.start()
         logger.info(f"✓ Emergency beep thread created and started")
     
+    def _warning_worker(self):
+        """Worker thread that applies queued warning alarms"""
+        while True:
+            alarm_type = self._warning_queue.get()
+            if alarm_type is None:
+                break
+            # Don't clear here - let check_alarms() handle it
+            self.set_alarm(alarm_type)
+    
+    def _queue_warning(self, alarm_type):
+        """
+        Queue a warning alarm for the worker thread (non-blocking)
+        
+        Args:
+            alarm_type: One of ALARM_* constants (None stops the worker)
+        """
+        try:
+            self._warning_queue.put_nowait(alarm_type)
+        except queue.Full:
+            # Replace pending request with the newest one
+            try:
+                self._warning_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._warning_queue.put_nowait(alarm_type)
+            except queue.Full:
+                pass
+    
     def sound_procedure_warning(self, duration=2.0):
         """
         Sound procedure warning (non-blocking)
         Used for violations like starting pump without pressure
         
         Args:
-            duration: How long to sound alarm (seconds)
+            duration: Kept for compatibility (alarm is cleared by check_alarms())
         """
-        def alarm_for_duration():
-            self.set_alarm(self.ALARM_PROCEDURE_WARNING)
-            time.sleep(duration)
-            # Don't clear here - let check_alarms() handle it
-        
-        threading.Thread(target=alarm_for_duration, daemon=True).start()
+        self._queue_warning(self.ALARM_PROCEDURE_WARNING)
     
     def sound_interlock_warning(self, duration=1.5):
         """
@@ -271,20 +317,20 @@ class BuzzerAlarm:
         Used when trying to move rods without meeting conditions
         
         Args:
-            duration: How long to sound alarm (seconds)
+            duration: Kept for compatibility (alarm is cleared by check_alarms())
         """
-        def alarm_for_duration():
-            self.set_alarm(self.ALARM_INTERLOCK)
-            time.sleep(duration)
-            # Don't clear here - let check_alarms() handle it
-        
-        threading.Thread(target=alarm_for_duration, daemon=True).start()
+        self._queue_warning(self.ALARM_INTERLOCK)
     
     def cleanup(self):
         """Cleanup buzzer resources"""
         logger.info("Cleaning up buzzer alarm...")
         self.stop_alarm_flag = True
         self.alarm_active = False
+        self.alarm_changed.set()
+        
+        self._queue_warning(None)
+        if self._warning_thread.is_alive():
+            self._warning_thread.join(timeout=1.0)
         
         if self.alarm_thread and self.alarm_thread.is_alive():
             self.alarm_thread.join(timeout=2.0)
@@ -303,6 +349,15 @@ class BuzzerAlarm:
 # ============================================
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Buzzer Alarm Controller Test')
+    parser.add_argument('--speed', type=float, default=1.0,
+                       help='Speed factor for waits between tests (e.g. 10 = 10x faster)')
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be > 0")
+    
     logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
     
     print("="*60)
@@ -312,29 +367,25 @@ if __name__ == "__main__":
     # Create buzzer instance
     buzzer = BuzzerAlarm(buzzer_pin=18)
     
-    print("\nTest 1: Procedure Warning (2 kHz, 2 seconds)")
-    buzzer.sound_procedure_warning(duration=2.0)
-    time.sleep(3)
-    
-    print("\nTest 2: Pressure Warning (2.5 kHz)")
-    buzzer.set_alarm(BuzzerAlarm.ALARM_PRESSURE_WARNING)
-    time.sleep(3)
-    
-    print("\nTest 3: Pressure CRITICAL (3 kHz, double beep)")
-    buzzer.set_alarm(BuzzerAlarm.ALARM_PRESSURE_CRITICAL)
-    time.sleep(3)
-    
-    print("\nTest 4: EMERGENCY (4 kHz, rapid beep)")
-    buzzer.set_alarm(BuzzerAlarm.ALARM_EMERGENCY)
-    time.sleep(3)
-    
-    print("\nTest 5: Interlock Warning (1.5 kHz)")
-    buzzer.sound_interlock_warning(duration=1.5)
-    time.sleep(2)
+    # Test script: (header, action, wait seconds)
+    steps = (
+        ("Test 1: Procedure Warning (2 kHz, 2 seconds)",
+         lambda: buzzer.sound_procedure_warning(duration=2.0), 3),
+        ("Test 2: Pressure Warning (2.5 kHz)",
+         lambda: buzzer.set_alarm(BuzzerAlarm.ALARM_PRESSURE_WARNING), 3),
+        ("Test 3: Pressure CRITICAL (3 kHz, double beep)",
+         lambda: buzzer.set_alarm(BuzzerAlarm.ALARM_PRESSURE_CRITICAL), 3),
+        ("Test 4: EMERGENCY (4 kHz, rapid beep)",
+         lambda: buzzer.set_alarm(BuzzerAlarm.ALARM_EMERGENCY), 3),
+        ("Test 5: Interlock Warning (1.5 kHz)",
+         lambda: buzzer.sound_interlock_warning(duration=1.5), 2),
+        ("Test 6: Clear alarm", buzzer.clear_alarm, 1),
+    )
     
-    print("\nTest 6: Clear alarm")
-    buzzer.clear_alarm()
-    time.sleep(1)
+    for header, action, wait in steps:
+        print("\n" + header)
+        action()
+        time.sleep(wait / args.speed)
     
     print("\nCleaning up...")
     buzzer.cleanup()
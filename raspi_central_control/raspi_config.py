@@ -115,6 +115,8 @@ I2C_RETRY_COUNT = 3
 LOG_FILE = "pltn_control.log"
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Console: waktu relatif (ms sejak start), tanpa asctime/strftime per record
+LOG_FORMAT_CONSOLE = "%(relativeCreated)9.0f - %(name)s - %(levelname)s - %(message)s"
 LOG_DATA_INTERVAL = 5.0  # Log data setiap 5 detik
 
 # Data Logging
@@ -89,6 +89,7 @@ class ButtonHandler:
         self.debounce_time = debounce_time
         self.last_press_time = {}
         self.last_state = {}
+        self._pending_edges = set()  # Edge pins waiting for 2nd LOW sample
         self.callbacks = {}
         
         # ============================================
@@ -122,16 +123,36 @@ class ButtonHandler:
             ButtonPin.PRESSURE_DOWN
         }
         
+        # Precomputed (pin, name) tuples per detection type
+        # (no set/dict lookup per poll, name is already at hand for logging)
+        self._edge_pins = tuple((pin, BUTTON_NAMES[pin]) for pin in ButtonPin
+                                if pin in self.EDGE_BUTTONS)
+        self._level_pins = tuple((pin, BUTTON_NAMES[pin]) for pin in ButtonPin
+                                 if pin in self.LEVEL_BUTTONS)
+        
         # Initialize GPIO
         GPIO.setmode(GPIO.BCM)
         GPIO.setwarnings(False)
         
         # Setup all button pins as INPUT with PULL_UP
         # (Buttons connect pin to GND when pressed)
-        for pin in ButtonPin:
-            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-            self.last_press_time[pin] = 0
-            self.last_state[pin] = GPIO.HIGH
+        # If setup fails halfway, release the pins already configured so a
+        # rerun does not start with stale pin config
+        configured = []
+        try:
+            for pin in ButtonPin:
+                GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+                configured.append(pin)
+                self.last_press_time[pin] = 0
+                self.last_state[pin] = GPIO.HIGH
+        except Exception:
+            logger.error(f"GPIO setup failed after {len(configured)} pins, cleaning up")
+            for pin in configured:
+                try:
+                    GPIO.cleanup(pin)
+                except Exception:
+                    pass
+            raise
             
         logger.info("GPIO Button Handler initialized (HYBRID mode)")
         logger.info(f"  - Edge detection: {len(self.EDGE_BUTTONS)} buttons (toggle)")
@@ -155,77 +176,91 @@ class ButtonHandler:
         Should be called frequently (e.g., every 5ms) in main loop
         """
         current_time = time.time()
+        last_state = self.last_state
+        pending = self._pending_edges
         
-        for pin in ButtonPin:
+        # ============================================
+        # EDGE DETECTION (for toggle buttons)
+        # ============================================
+        for pin, name in self._edge_pins:
             current_state = GPIO.input(pin)
             
-            # ============================================
-            # EDGE DETECTION (for toggle buttons)
-            # ============================================
-            if pin in self.EDGE_BUTTONS:
-                # Detect HIGH to LOW transition (button press)
-                if current_state == GPIO.LOW and self.last_state[pin] == GPIO.HIGH:
-                    # 2-sample confirmation to filter bounce noise
-                    time.sleep(0.002)  # Wait 2ms
-                    if GPIO.input(pin) == GPIO.LOW:  # Still pressed?
-                        # Check debounce
-                        time_since_last = current_time - self.last_press_time[pin]
-                        
-                        if time_since_last > self.debounce_time:
-                            self.last_press_time[pin] = current_time
-                            
-                            logger.info(f"✓ Button pressed (EDGE): {BUTTON_NAMES[pin]}")
-                            
-                            # Trigger callback if registered
-                            if pin in self.callbacks:
-                                try:
-                                    self.callbacks[pin]()
-                                except Exception as e:
-                                    logger.error(f"Error in callback for {BUTTON_NAMES[pin]}: {e}")
-                            else:
-                                logger.warning(f"⚠ No callback registered for {BUTTON_NAMES[pin]}")
-            
-            # ============================================
-            # LEVEL DETECTION (for continuous buttons)
-            # ============================================
-            elif pin in self.LEVEL_BUTTONS:
-                # Trigger while button is held (LOW)
-                if current_state == GPIO.LOW:
+            # Detect HIGH to LOW transition (button press)
+            # 2-sample confirmation to filter bounce noise: the first LOW
+            # sample only marks the pin, the press fires if the next poll
+            # still reads LOW (no in-loop sleep stalling the other pins)
+            if current_state == GPIO.LOW:
+                if last_state[pin] == GPIO.HIGH:
+                    pending.add(pin)
+                elif pin in pending:
+                    pending.discard(pin)
+                    # Check debounce
                     time_since_last = current_time - self.last_press_time[pin]
                     
-                    # Rate limiting: trigger every 50ms while held
-                    if time_since_last > 0.05:  # 50ms repeat interval
+                    if time_since_last > self.debounce_time:
                         self.last_press_time[pin] = current_time
                         
-                        logger.debug(f"✓ Button held (LEVEL): {BUTTON_NAMES[pin]}")
+                        logger.info("✓ Button pressed (EDGE): %s", name)
                         
                         # Trigger callback if registered
                         if pin in self.callbacks:
                             try:
                                 self.callbacks[pin]()
                             except Exception as e:
-                                logger.error(f"Error in callback for {BUTTON_NAMES[pin]}: {e}")
+                                logger.error(f"Error in callback for {name}: {e}")
+                        else:
+                            logger.warning(f"⚠ No callback registered for {name}")
+            else:
+                pending.discard(pin)  # Released before confirmation (bounce)
+            
+            # Update last state AFTER checking
+            last_state[pin] = current_state
+        
+        # ============================================
+        # LEVEL DETECTION (for continuous buttons)
+        # ============================================
+        for pin, name in self._level_pins:
+            current_state = GPIO.input(pin)
+            
+            # Trigger while button is held (LOW)
+            if current_state == GPIO.LOW:
+                time_since_last = current_time - self.last_press_time[pin]
+                
+                # Rate limiting: trigger every 50ms while held
+                if time_since_last > 0.05:  # 50ms repeat interval
+                    self.last_press_time[pin] = current_time
+                    
+                    logger.debug("✓ Button held (LEVEL): %s", name)
+                    
+                    # Trigger callback if registered
+                    if pin in self.callbacks:
+                        try:
+                            self.callbacks[pin]()
+                        except Exception as e:
+                            logger.error(f"Error in callback for {name}: {e}")
             
             # Update last state AFTER checking
-            self.last_state[pin] = current_state
+            last_state[pin] = current_state
     
     def check_hold_buttons(self, hold_interval=0.05):
         """
         Check if buttons are being HELD (LEVEL detection)
-        Returns set of ButtonPin that are currently pressed (LOW)
+        Returns set of LEVEL ButtonPin that are currently pressed (LOW)
         
         This allows continuous action while holding button (for rods and pressure)
+        Only LEVEL buttons are read - edge buttons are handled by check_all_buttons()
+        (halves GPIO reads per cycle and keeps edge debounce timestamps untouched)
         
         Args:
             hold_interval: Minimum interval between repeated actions (default 50ms)
             
         Returns:
-            set: Set of ButtonPin currently pressed
+            set: Set of LEVEL ButtonPin currently pressed
         """
         current_time = time.time()
         pressed_buttons = set()
         
-        for pin in ButtonPin:
+        for pin, _ in self._level_pins:
             current_state = GPIO.input(pin)
             
             # Check if button is pressed (LOW) and interval passed
@@ -280,4 +315,5 @@ if __name__ == "__main__":
             
     except KeyboardInterrupt:
         print("\n\nTest interrupted by user")
+    finally:
         handler.cleanup()
@@ -10,9 +10,9 @@ import sys
 import threading
 import json
 from pathlib import Path
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 from typing import Optional
-from queue import Queue, Empty
+from queue import Queue, Empty, Full
 from enum import Enum
 
 # Import our modules
@@ -32,13 +32,24 @@ except ImportError:
     logging.warning("RPi.GPIO not available. Running in simulation mode.")
     GPIO_AVAILABLE = False
 
+# Optional fast JSON encoder for the 10 Hz state export (falls back to stdlib json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Setup logging
+# File keeps wall-clock timestamps; console uses relative time so each
+# record only pays for one asctime formatting (in the file handler)
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(logging.Formatter(config.LOG_FORMAT_CONSOLE))
 logging.basicConfig(
     level=getattr(logging, config.LOG_LEVEL),
     format=config.LOG_FORMAT,
     handlers=[
         logging.FileHandler(config.LOG_FILE),
-        logging.StreamHandler(sys.stdout)
+        _console_handler
     ]
 )
 logger = logging.getLogger(__name__)
@@ -69,6 +80,52 @@ class ButtonEvent(Enum):
     START_AUTO_SIMULATION = "START_AUTO_SIMULATION"  # Trigger auto simulation
 
 
+# Pump table: (name, status field, transition start field) in PanelState
+# Status: 0=OFF, 1=STARTING, 2=ON, 3=SHUTTING_DOWN
+PUMP_FIELDS = (
+    ("Primary", "pump_primary_status", "pump_primary_transition_start"),
+    ("Secondary", "pump_secondary_status", "pump_secondary_transition_start"),
+    ("Tertiary", "pump_tertiary_status", "pump_tertiary_transition_start"),
+)
+
+# Pump button events: event -> (name, status field, turn_on)
+PUMP_BUTTON_EVENTS = {
+    ButtonEvent.PUMP_PRIMARY_ON: ("Primary", "pump_primary_status", True),
+    ButtonEvent.PUMP_PRIMARY_OFF: ("Primary", "pump_primary_status", False),
+    ButtonEvent.PUMP_SECONDARY_ON: ("Secondary", "pump_secondary_status", True),
+    ButtonEvent.PUMP_SECONDARY_OFF: ("Secondary", "pump_secondary_status", False),
+    ButtonEvent.PUMP_TERTIARY_ON: ("Tertiary", "pump_tertiary_status", True),
+    ButtonEvent.PUMP_TERTIARY_OFF: ("Tertiary", "pump_tertiary_status", False),
+}
+
+# Max pending events before hold-repeat events are dropped (coalesced)
+HOLD_EVENT_BACKLOG = 4
+
+# PanelState fields restored by REACTOR_RESET (running, turbine_speed and
+# auto_sim_step/phase are intentionally left as they are)
+RESET_STATE = {
+    "auto_sim_running": False,
+    "simulation_mode": 'manual',
+    "emergency_active": False,
+    "pressure": 0.0,
+    "thermal_kw": 0.0,
+    "pump_primary_status": 0,
+    "pump_secondary_status": 0,
+    "pump_tertiary_status": 0,
+    "pump_primary_transition_start": 0.0,
+    "pump_secondary_transition_start": 0.0,
+    "pump_tertiary_transition_start": 0.0,
+    "safety_rod": 0,
+    "shim_rod": 0,
+    "regulating_rod": 0,
+    "humid_ct1_cmd": 0,
+    "humid_ct2_cmd": 0,
+    "humid_ct3_cmd": 0,
+    "humid_ct4_cmd": 0,
+    "interlock_satisfied": False,
+}
+
+
 @dataclass
 class PanelState:
     """Panel control system state"""
@@ -145,12 +202,19 @@ class PLTNPanelController:
         # Flag for immediate ESP communication (bypass cycle wait)
         self.esp_send_immediate = threading.Event()
         
+        # Stop signal: threads wait on this instead of sleeping, so shutdown
+        # wakes them immediately instead of after their full cycle
+        self.stop_event = threading.Event()
+        self.threads = []
+        
         # Initialize hardware components with graceful degradation
         logger.info("Phase 1: Core hardware initialization...")
         try:
             self.init_multiplexers()
-            self.init_uart_master()  # Changed from init_i2c_master
+            # Buttons first: GPIO setup is instant, so a failure aborts before
+            # the UART handshake spends ~1.5s opening ports and pinging ESPs
             self.init_buttons()
+            self.init_uart_master()  # Changed from init_i2c_master
         except Exception as e:
             logger.error(f"Critical hardware initialization failed: {e}")
             logger.error("Cannot continue without core hardware")
@@ -227,42 +291,47 @@ class PLTNPanelController:
     def init_buttons(self):
         """Initialize button manager with 17 buttons and fallback"""
         try:
-            from raspi_gpio_buttons import ButtonPin
-            
             self.button_manager = ButtonManager()
             
             # Register button callbacks using ButtonPin enum
-            # Pressure control (2 buttons)
-            self.button_manager.register_callback(ButtonPin.PRESSURE_UP, self.on_pressure_up)
-            self.button_manager.register_callback(ButtonPin.PRESSURE_DOWN, self.on_pressure_down)
-            
-            # Pump controls (6 buttons)
-            self.button_manager.register_callback(ButtonPin.PUMP_PRIMARY_ON, self.on_pump_primary_on)
-            self.button_manager.register_callback(ButtonPin.PUMP_PRIMARY_OFF, self.on_pump_primary_off)
-            self.button_manager.register_callback(ButtonPin.PUMP_SECONDARY_ON, self.on_pump_secondary_on)
-            self.button_manager.register_callback(ButtonPin.PUMP_SECONDARY_OFF, self.on_pump_secondary_off)
-            self.button_manager.register_callback(ButtonPin.PUMP_TERTIARY_ON, self.on_pump_tertiary_on)
-            self.button_manager.register_callback(ButtonPin.PUMP_TERTIARY_OFF, self.on_pump_tertiary_off)
-            
-            # Rod controls (6 buttons)
-            self.button_manager.register_callback(ButtonPin.SAFETY_ROD_UP, self.on_safety_rod_up)
-            self.button_manager.register_callback(ButtonPin.SAFETY_ROD_DOWN, self.on_safety_rod_down)
-            self.button_manager.register_callback(ButtonPin.SHIM_ROD_UP, self.on_shim_rod_up)
-            self.button_manager.register_callback(ButtonPin.SHIM_ROD_DOWN, self.on_shim_rod_down)
-            self.button_manager.register_callback(ButtonPin.REGULATING_ROD_UP, self.on_regulating_rod_up)
-            self.button_manager.register_callback(ButtonPin.REGULATING_ROD_DOWN, self.on_regulating_rod_down)
-            
-            # System control buttons (2 buttons) - v4.0: Simplified
-            self.button_manager.register_callback(ButtonPin.START_AUTO_SIMULATION, self.on_start_auto_simulation)
-            self.button_manager.register_callback(ButtonPin.REACTOR_RESET, self.on_reactor_reset)
-            
-            # Emergency button (1 button)
-            self.button_manager.register_callback(ButtonPin.EMERGENCY, self.on_emergency)
+            bindings = (
+                # Pressure control (2 buttons)
+                (ButtonPin.PRESSURE_UP, self.on_pressure_up),
+                (ButtonPin.PRESSURE_DOWN, self.on_pressure_down),
+                # Pump controls (6 buttons)
+                (ButtonPin.PUMP_PRIMARY_ON, self.on_pump_primary_on),
+                (ButtonPin.PUMP_PRIMARY_OFF, self.on_pump_primary_off),
+                (ButtonPin.PUMP_SECONDARY_ON, self.on_pump_secondary_on),
+                (ButtonPin.PUMP_SECONDARY_OFF, self.on_pump_secondary_off),
+                (ButtonPin.PUMP_TERTIARY_ON, self.on_pump_tertiary_on),
+                (ButtonPin.PUMP_TERTIARY_OFF, self.on_pump_tertiary_off),
+                # Rod controls (6 buttons)
+                (ButtonPin.SAFETY_ROD_UP, self.on_safety_rod_up),
+                (ButtonPin.SAFETY_ROD_DOWN, self.on_safety_rod_down),
+                (ButtonPin.SHIM_ROD_UP, self.on_shim_rod_up),
+                (ButtonPin.SHIM_ROD_DOWN, self.on_shim_rod_down),
+                (ButtonPin.REGULATING_ROD_UP, self.on_regulating_rod_up),
+                (ButtonPin.REGULATING_ROD_DOWN, self.on_regulating_rod_down),
+                # System control buttons (2 buttons) - v4.0: Simplified
+                (ButtonPin.START_AUTO_SIMULATION, self.on_start_auto_simulation),
+                (ButtonPin.REACTOR_RESET, self.on_reactor_reset),
+                # Emergency button (1 button)
+                (ButtonPin.EMERGENCY, self.on_emergency),
+            )
+            for pin, callback in bindings:
+                self.button_manager.register_callback(pin, callback)
             
             callback_count = len(self.button_manager.callbacks)
             logger.info(f"✓ Button manager initialized: {callback_count} callbacks registered")
-            if callback_count != 17:
-                logger.warning(f"⚠️  Expected 17 callbacks, but {callback_count} registered!")
+            
+            # Set comparison names exactly which buttons are unbound (or unknown)
+            registered = set(self.button_manager.callbacks)
+            missing = set(ButtonPin) - registered
+            extra = registered - set(ButtonPin)
+            if missing:
+                logger.warning("⚠️  No callback for: %s", ", ".join(sorted(pin.name for pin in missing)))
+            if extra:
+                logger.warning("⚠️  Callbacks for unknown pins: %s", ", ".join(sorted(map(str, extra))))
         except Exception as e:
             logger.warning(f"⚠️  Failed to initialize buttons: {e}")
             logger.warning("   Button input will not be available")
@@ -275,9 +344,7 @@ class PLTNPanelController:
             self.humidifier = HumidifierController()
             logger.info("✓ Humidifier controller initialized")
         except Exception as e:
-            logger.error(f"❌ Failed to initialize humidifier: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ Failed to initialize humidifier: {e}")
             logger.warning("   Humidifier control will not be available")
             self.humidifier = None
             # Don't raise - make it non-critical
@@ -288,9 +355,7 @@ class PLTNPanelController:
             self.buzzer = BuzzerAlarm()
             logger.info("✓ Buzzer alarm initialized")
         except Exception as e:
-            logger.error(f"❌ Failed to initialize buzzer: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ Failed to initialize buzzer: {e}")
             logger.warning("   Alarm buzzer will not be available")
             self.buzzer = None
             # Don't raise - make it non-critical
@@ -299,7 +364,6 @@ class PLTNPanelController:
         """Initialize 9 OLED displays (0.91 inch 128x32) with timeout"""
         try:
             from raspi_oled_manager import OLEDManager
-            import threading
             
             self.oled_manager = OLEDManager(
                 mux_manager=self.mux_manager,
@@ -525,9 +589,7 @@ class PLTNPanelController:
                 logger.critical("   Turbine spin-down continues (~12 seconds total)")
                 
             except Exception as e:
-                logger.error(f"❌ SCRAM sequence error: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"❌ SCRAM sequence error: {e}")
         
         # Run in separate thread (non-blocking)
         scram_thread_obj = threading.Thread(target=scram_thread, daemon=True)
@@ -571,9 +633,7 @@ class PLTNPanelController:
             logger.info("✅ Turbine spin-down complete (0%)")
             
         except Exception as e:
-            logger.error(f"❌ Turbine spin-down error: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.exception(f"❌ Turbine spin-down error: {e}")
     
     
     # ============================================
@@ -595,52 +655,28 @@ class PLTNPanelController:
                 self.state.pressure = max(self.state.pressure - 1.0, 0.0)  # 1 bar decrement
                 # Removed logging for performance
             
-            elif event == ButtonEvent.PUMP_PRIMARY_ON:
-                if self.state.pump_primary_status == 0:
-                    # Check safety conditions before starting
-                    if self._check_pump_start_safe("Primary"):
-                        self.state.pump_primary_status = 1
-                        logger.info("✓ Primary pump starting (safety checks passed)")
-                    # else: already logged and buzzed by _check_pump_start_safe()
-            
-            elif event == ButtonEvent.PUMP_PRIMARY_OFF:
-                if self.state.pump_primary_status == 2:
-                    self.state.pump_primary_status = 3
-                    # Removed logging for performance
-            
-            elif event == ButtonEvent.PUMP_SECONDARY_ON:
-                if self.state.pump_secondary_status == 0:
-                    # Check safety conditions before starting
-                    if self._check_pump_start_safe("Secondary"):
-                        self.state.pump_secondary_status = 1
-                        logger.info("✓ Secondary pump starting (safety checks passed)")
-                    # else: already logged and buzzed by _check_pump_start_safe()
-            
-            elif event == ButtonEvent.PUMP_SECONDARY_OFF:
-                if self.state.pump_secondary_status == 2:
-                    self.state.pump_secondary_status = 3
-                    # Removed logging for performance
-            
-            elif event == ButtonEvent.PUMP_TERTIARY_ON:
-                if self.state.pump_tertiary_status == 0:
-                    # Check safety conditions before starting
-                    if self._check_pump_start_safe("Tertiary"):
-                        self.state.pump_tertiary_status = 1
-                        logger.info("✓ Tertiary pump starting (safety checks passed)")
-                    # else: already logged and buzzed by _check_pump_start_safe()
-            
-            elif event == ButtonEvent.PUMP_TERTIARY_OFF:
-                if self.state.pump_tertiary_status == 2:
-                    self.state.pump_tertiary_status = 3
+            elif event in PUMP_BUTTON_EVENTS:
+                name, status_attr, turn_on = PUMP_BUTTON_EVENTS[event]
+                status = getattr(self.state, status_attr)
+                if turn_on:
+                    if status == 0:
+                        # Check safety conditions before starting
+                        if self._check_pump_start_safe(name):
+                            setattr(self.state, status_attr, 1)
+                            logger.info("✓ %s pump starting (safety checks passed)", name)
+                        # else: already logged and buzzed by _check_pump_start_safe()
+                elif status == 2:
+                    setattr(self.state, status_attr, 3)
                     # Removed logging for performance
             
             elif event == ButtonEvent.SAFETY_ROD_UP:
                 if not self._check_interlock_internal():
                     logger.warning("⚠️  INTERLOCK VIOLATION: Cannot raise safety rod!")
-                    logger.warning(f"   Pressure: {self.state.pressure:.1f} bar (need >= 140 bar)")
-                    logger.warning(f"   Pumps: Primary={self.state.pump_primary_status}, "
-                                 f"Secondary={self.state.pump_secondary_status}, "
-                                 f"Tertiary={self.state.pump_tertiary_status} (need all = 2)")
+                    logger.warning("   Pressure: %.1f bar (need >= 140 bar)", self.state.pressure)
+                    logger.warning("   Pumps: Primary=%d, Secondary=%d, Tertiary=%d (need all = 2)",
+                                   self.state.pump_primary_status,
+                                   self.state.pump_secondary_status,
+                                   self.state.pump_tertiary_status)
                     
                     # Trigger interlock violation buzzer (1.5 second beep)
                     if self.buzzer:
@@ -672,8 +708,8 @@ class PLTNPanelController:
                 # Check safety rod priority: safety rod must be 100% before raising shim
                 if self.state.safety_rod < 100:
                     logger.warning("⚠️  SAFETY ROD PRIORITY: Cannot raise shim rod!")
-                    logger.warning(f"   Safety rod must be at 100% first (currently: {self.state.safety_rod}%)")
-                    logger.warning(f"   Correct sequence: Safety rod to 100% → Then shim/regulating rods")
+                    logger.warning("   Safety rod must be at 100%% first (currently: %d%%)", self.state.safety_rod)
+                    logger.warning("   Correct sequence: Safety rod to 100% → Then shim/regulating rods")
                     
                     # Trigger buzzer warning
                     if self.buzzer:
@@ -687,10 +723,11 @@ class PLTNPanelController:
                 # Check interlock conditions
                 if not self._check_interlock_internal():
                     logger.warning("⚠️  INTERLOCK VIOLATION: Cannot raise shim rod!")
-                    logger.warning(f"   Pressure: {self.state.pressure:.1f} bar (need >= 140 bar)")
-                    logger.warning(f"   Pumps: Primary={self.state.pump_primary_status}, "
-                                 f"Secondary={self.state.pump_secondary_status}, "
-                                 f"Tertiary={self.state.pump_tertiary_status} (need all = 2)")
+                    logger.warning("   Pressure: %.1f bar (need >= 140 bar)", self.state.pressure)
+                    logger.warning("   Pumps: Primary=%d, Secondary=%d, Tertiary=%d (need all = 2)",
+                                   self.state.pump_primary_status,
+                                   self.state.pump_secondary_status,
+                                   self.state.pump_tertiary_status)
                     
                     # Trigger interlock violation buzzer
                     if self.buzzer:
@@ -711,8 +748,8 @@ class PLTNPanelController:
                 # Check safety rod priority: safety rod must be 100% before raising regulating
                 if self.state.safety_rod < 100:
                     logger.warning("⚠️  SAFETY ROD PRIORITY: Cannot raise regulating rod!")
-                    logger.warning(f"   Safety rod must be at 100% first (currently: {self.state.safety_rod}%)")
-                    logger.warning(f"   Correct sequence: Safety rod to 100% → Then shim/regulating rods")
+                    logger.warning("   Safety rod must be at 100%% first (currently: %d%%)", self.state.safety_rod)
+                    logger.warning("   Correct sequence: Safety rod to 100% → Then shim/regulating rods")
                     
                     # Trigger buzzer warning
                     if self.buzzer:
@@ -726,10 +763,11 @@ class PLTNPanelController:
                 # Check interlock conditions
                 if not self._check_interlock_internal():
                     logger.warning("⚠️  INTERLOCK VIOLATION: Cannot raise regulating rod!")
-                    logger.warning(f"   Pressure: {self.state.pressure:.1f} bar (need >= 140 bar)")
-                    logger.warning(f"   Pumps: Primary={self.state.pump_primary_status}, "
-                                 f"Secondary={self.state.pump_secondary_status}, "
-                                 f"Tertiary={self.state.pump_tertiary_status} (need all = 2)")
+                    logger.warning("   Pressure: %.1f bar (need >= 140 bar)", self.state.pressure)
+                    logger.warning("   Pumps: Primary=%d, Secondary=%d, Tertiary=%d (need all = 2)",
+                                   self.state.pump_primary_status,
+                                   self.state.pump_secondary_status,
+                                   self.state.pump_tertiary_status)
                     
                     # Trigger interlock violation buzzer
                     if self.buzzer:
@@ -761,42 +799,21 @@ class PLTNPanelController:
                         self.buzzer.trigger_emergency_beep()
                         logger.critical("   ✓ Emergency buzzer triggered")
                     except Exception as e:
-                        logger.error(f"   ❌ Buzzer trigger failed: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+                        logger.exception(f"   ❌ Buzzer trigger failed: {e}")
                 else:
                     logger.warning("   ⚠️  Buzzer not available")
                     
             elif event == ButtonEvent.REACTOR_RESET:
-                # Stop auto simulation if running
-                self.state.auto_sim_running = False
-                self.state.simulation_mode = 'manual'
-                self.state.emergency_active = False
-                self.state.pressure = 0.0
-                self.state.thermal_kw = 0.0
-                self.state.pump_primary_status = 0
-                self.state.pump_secondary_status = 0
-                self.state.pump_tertiary_status = 0
-                self.state.pump_primary_transition_start = 0.0
-                self.state.pump_secondary_transition_start = 0.0
-                self.state.pump_tertiary_transition_start = 0.0
-                self.state.safety_rod = 0
-                self.state.shim_rod = 0
-                self.state.regulating_rod = 0
-                self.state.humid_ct1_cmd = 0
-                self.state.humid_ct2_cmd = 0
-                self.state.humid_ct3_cmd = 0
-                self.state.humid_ct4_cmd = 0
-                self.state.interlock_satisfied = False
+                # Stop auto simulation if running and zero all process values
+                vars(self.state).update(RESET_STATE)
                 
                 # Reset OLED interpolators to zero (instant display update)
                 if self.oled_manager:
                     self.oled_manager.reset_all_interpolators()
                 
-                logger.info("=" * 60)
-                logger.info("🔄 SIMULATION RESET")
-                logger.info("All parameters reset. Press START to begin.")
-                logger.info("=" * 60)
+                # Single log call (this runs while holding state_lock)
+                logger.info("%s\n🔄 SIMULATION RESET\nAll parameters reset. Press START to begin.\n%s",
+                            "=" * 60, "=" * 60)
             
             elif event == ButtonEvent.START_AUTO_SIMULATION:
                 if self.state.auto_sim_running:
@@ -806,11 +823,11 @@ class PLTNPanelController:
                 # Start auto simulation
                 self.state.simulation_mode = 'auto'
                 self.state.auto_sim_running = True
-                logger.info("=" * 60)
-                logger.info("🤖 AUTO SIMULATION MODE ACTIVATED")
-                logger.info("Simulasi akan berjalan otomatis dengan kecepatan lambat")
-                logger.info("untuk memudahkan pemahaman cara kerja PLTN")
-                logger.info("=" * 60)
+                # Single log call (this runs while holding state_lock)
+                logger.info("%s\n🤖 AUTO SIMULATION MODE ACTIVATED\n"
+                            "Simulasi akan berjalan otomatis dengan kecepatan lambat\n"
+                            "untuk memudahkan pemahaman cara kerja PLTN\n%s",
+                            "=" * 60, "=" * 60)
             
             # Log if event not recognized
             else:
@@ -859,16 +876,12 @@ class PLTNPanelController:
                     # No events, continue loop
                     pass
                 except Exception as e:
-                    logger.error(f"Event processor error: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
+                    logger.exception(f"Event processor error: {e}")
             
             logger.info("Button event processor thread stopped")
             
         except Exception as e:
-            logger.critical(f"❌ FATAL: Event processor thread crashed on startup: {e}")
-            import traceback
-            logger.critical(traceback.format_exc())
+            logger.critical(f"❌ FATAL: Event processor thread crashed on startup: {e}", exc_info=True)
     
     # ============================================
     # Interlock Logic
@@ -911,7 +924,7 @@ class PLTNPanelController:
         # Check 2: Pressure >= 140 bar (operating pressure for rod withdrawal)
         # Pressure harus mencapai tekanan operasi penuh sebelum rod movement
         if self.state.pressure < 140.0:
-            logger.debug(f"Interlock: Pressure too low ({self.state.pressure:.1f} bar < 140 bar)")
+            logger.debug("Interlock: Pressure too low (%.1f bar < 140 bar)", self.state.pressure)
             return False
         
         # Check 3: No emergency active
@@ -922,13 +935,13 @@ class PLTNPanelController:
         # Check 4: All pumps must be ON (status == 2)
         # Status codes: 0=OFF,1=STARTING,2=ON,3=SHUTTING_DOWN
         if self.state.pump_primary_status != 2:
-            logger.debug(f"Interlock: Primary pump not ON (status={self.state.pump_primary_status})")
+            logger.debug("Interlock: Primary pump not ON (status=%d)", self.state.pump_primary_status)
             return False
         if self.state.pump_secondary_status != 2:
-            logger.debug(f"Interlock: Secondary pump not ON (status={self.state.pump_secondary_status})")
+            logger.debug("Interlock: Secondary pump not ON (status=%d)", self.state.pump_secondary_status)
             return False
         if self.state.pump_tertiary_status != 2:
-            logger.debug(f"Interlock: Tertiary pump not ON (status={self.state.pump_tertiary_status})")
+            logger.debug("Interlock: Tertiary pump not ON (status=%d)", self.state.pump_tertiary_status)
             return False
         
         # All checks passed - safe to move rods
@@ -1068,9 +1081,7 @@ class PLTNPanelController:
                         else:
                             logger.debug("Control: Humidifier not available, skipping")
                     except Exception as e:
-                        logger.error(f"Control: Humidifier update failed: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+                        logger.exception(f"Control: Humidifier update failed: {e}")
                     
                     # 3. Check and update alarm status
                     try:
@@ -1090,7 +1101,7 @@ class PLTNPanelController:
                     logger.debug("Control: All updates done, releasing lock...")
                 
                 logger.debug("Control: Lock released")
-                time.sleep(0.05)  # 50ms
+                self.stop_event.wait(0.05)  # 50ms
                 
                 # Log heartbeat every 10 seconds (200 loops x 50ms)
                 loop_count += 1
@@ -1099,9 +1110,7 @@ class PLTNPanelController:
                     loop_count = 0
                 
             except Exception as e:
-                logger.error(f"Error in control logic thread: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"Error in control logic thread: {e}")
                 time.sleep(0.1)
         
         logger.info("Control logic thread stopped")
@@ -1111,65 +1120,27 @@ class PLTNPanelController:
         Update pump status (simulate startup/shutdown) - NON-BLOCKING
         INTERNAL version - assumes state_lock is already held by caller
         """
-        # Primary pump
-        if self.state.pump_primary_status == 1:  # STARTING
-            if self.state.pump_primary_transition_start == 0:
-                self.state.pump_primary_transition_start = current_time
-                logger.info("Primary pump: STARTING (2s delay)")
-            elif current_time - self.state.pump_primary_transition_start >= 2.0:
-                self.state.pump_primary_status = 2  # ON
-                self.state.pump_primary_transition_start = 0
-                logger.info("Primary pump: ON")
-        elif self.state.pump_primary_status == 3:  # SHUTTING_DOWN
-            if self.state.pump_primary_transition_start == 0:
-                self.state.pump_primary_transition_start = current_time
-                logger.info("Primary pump: SHUTTING DOWN (1s delay)")
-            elif current_time - self.state.pump_primary_transition_start >= 1.0:
-                self.state.pump_primary_status = 0  # OFF
-                self.state.pump_primary_transition_start = 0
-                logger.info("Primary pump: OFF")
-        else:
-            self.state.pump_primary_transition_start = 0
-        
-        # Secondary pump
-        if self.state.pump_secondary_status == 1:  # STARTING
-            if self.state.pump_secondary_transition_start == 0:
-                self.state.pump_secondary_transition_start = current_time
-                logger.info("Secondary pump: STARTING (2s delay)")
-            elif current_time - self.state.pump_secondary_transition_start >= 2.0:
-                self.state.pump_secondary_status = 2  # ON
-                self.state.pump_secondary_transition_start = 0
-                logger.info("Secondary pump: ON")
-        elif self.state.pump_secondary_status == 3:  # SHUTTING_DOWN
-            if self.state.pump_secondary_transition_start == 0:
-                self.state.pump_secondary_transition_start = current_time
-                logger.info("Secondary pump: SHUTTING DOWN (1s delay)")
-            elif current_time - self.state.pump_secondary_transition_start >= 1.0:
-                self.state.pump_secondary_status = 0  # OFF
-                self.state.pump_secondary_transition_start = 0
-                logger.info("Secondary pump: OFF")
-        else:
-            self.state.pump_secondary_transition_start = 0
-        
-        # Tertiary pump
-        if self.state.pump_tertiary_status == 1:  # STARTING
-            if self.state.pump_tertiary_transition_start == 0:
-                self.state.pump_tertiary_transition_start = current_time
-                logger.info("Tertiary pump: STARTING (2s delay)")
-            elif current_time - self.state.pump_tertiary_transition_start >= 2.0:
-                self.state.pump_tertiary_status = 2  # ON
-                self.state.pump_tertiary_transition_start = 0
-                logger.info("Tertiary pump: ON")
-        elif self.state.pump_tertiary_status == 3:  # SHUTTING_DOWN
-            if self.state.pump_tertiary_transition_start == 0:
-                self.state.pump_tertiary_transition_start = current_time
-                logger.info("Tertiary pump: SHUTTING DOWN (1s delay)")
-            elif current_time - self.state.pump_tertiary_transition_start >= 1.0:
-                self.state.pump_tertiary_status = 0  # OFF
-                self.state.pump_tertiary_transition_start = 0
-                logger.info("Tertiary pump: OFF")
-        else:
-            self.state.pump_tertiary_transition_start = 0
+        state = self.state
+        for name, status_attr, start_attr in PUMP_FIELDS:
+            status = getattr(state, status_attr)
+            if status == 1:  # STARTING
+                if getattr(state, start_attr) == 0:
+                    setattr(state, start_attr, current_time)
+                    logger.info("%s pump: STARTING (2s delay)", name)
+                elif current_time - getattr(state, start_attr) >= 2.0:
+                    setattr(state, status_attr, 2)  # ON
+                    setattr(state, start_attr, 0)
+                    logger.info("%s pump: ON", name)
+            elif status == 3:  # SHUTTING_DOWN
+                if getattr(state, start_attr) == 0:
+                    setattr(state, start_attr, current_time)
+                    logger.info("%s pump: SHUTTING DOWN (1s delay)", name)
+                elif current_time - getattr(state, start_attr) >= 1.0:
+                    setattr(state, status_attr, 0)  # OFF
+                    setattr(state, start_attr, 0)
+                    logger.info("%s pump: OFF", name)
+            else:
+                setattr(state, start_attr, 0)
     
     # ============================================
     # ESP Communication Thread
@@ -1200,37 +1171,37 @@ class PLTNPanelController:
                     self.esp_send_immediate.clear()  # Reset flag
                 
                 with self.uart_lock:
+                    # Snapshot commands under state_lock (short hold), then do the
+                    # UART exchange without it so button events / control loop
+                    # are not blocked for the whole round trip
                     with self.state_lock:
-                        # Send to ESP-BC (Control Rods + Pumps + Turbine + Humidifier)
-                        logger.info(f"TX /dev/ttyAMA0: { {'cmd':'update', 'rods':[self.state.safety_rod,self.state.shim_rod,self.state.regulating_rod], 'pumps':[self.state.pump_primary_status,self.state.pump_secondary_status,self.state.pump_tertiary_status], 'humid_ct':[self.state.humid_ct1_cmd,self.state.humid_ct2_cmd,self.state.humid_ct3_cmd,self.state.humid_ct4_cmd]} }")
-                        
-                        if not self.uart_master.esp_bc_connected:
-                            logger.warning("⚠️  ESP-BC not connected, skipping UART send")
-                            success = False
-                        else:
-                            success = self.uart_master.update_esp_bc(
-                            self.state.safety_rod,
-                            self.state.shim_rod,
-                            self.state.regulating_rod,
-                            self.state.pump_primary_status,
-                            self.state.pump_secondary_status,
-                            self.state.pump_tertiary_status,
-                            self.state.humid_ct1_cmd,
-                            self.state.humid_ct2_cmd,
-                            self.state.humid_ct3_cmd,
-                            self.state.humid_ct4_cmd
-                        )
-                        
-                        if success:
-                            logger.debug("✓ ESP-BC update success")
-                            # Get data back from ESP-BC
-                            esp_bc_data = self.uart_master.get_esp_bc_data()
+                        rods = (self.state.safety_rod, self.state.shim_rod, self.state.regulating_rod)
+                        pumps = (self.state.pump_primary_status, self.state.pump_secondary_status,
+                                 self.state.pump_tertiary_status)
+                        humid = (self.state.humid_ct1_cmd, self.state.humid_ct2_cmd,
+                                 self.state.humid_ct3_cmd, self.state.humid_ct4_cmd)
+                    
+                    # Send to ESP-BC (Control Rods + Pumps + Turbine + Humidifier)
+                    logger.info("TX /dev/ttyAMA0: {'cmd': 'update', 'rods': %s, 'pumps': %s, 'humid_ct': %s}",
+                                list(rods), list(pumps), list(humid))
+                    
+                    if not self.uart_master.esp_bc_connected:
+                        logger.warning("⚠️  ESP-BC not connected, skipping UART send")
+                        success = False
+                    else:
+                        success = self.uart_master.update_esp_bc(*rods, *pumps, *humid)
+                    
+                    if success:
+                        logger.debug("✓ ESP-BC update success")
+                        # Get data back from ESP-BC
+                        esp_bc_data = self.uart_master.get_esp_bc_data()
+                        with self.state_lock:
                             self.state.thermal_kw = esp_bc_data.kw_thermal
                             self.state.turbine_speed = esp_bc_data.turbine_speed
-                            # Gap before sending to ESP-E (reduced for faster response)
-                            time.sleep(0.005)  # 5ms (reduced from 30ms)
-                        else:
-                            logger.warning("⚠️  ESP-BC update failed")
+                        # No gap needed before ESP-E: it is on its own UART
+                        # (ttyAMA3), unlike the old shared I2C bus
+                    else:
+                        logger.warning("⚠️  ESP-BC update failed")
                 
                 # Send to ESP-E outside of state_lock (non-critical, can be slower)
                 # THROTTLED: Only send every 200ms to prevent buffer overflow
@@ -1243,7 +1214,10 @@ class PLTNPanelController:
                             # Send to ESP-E (Power Indicator + Water Flow Visualization)
                             # Only show power when turbine PWM > 50% (DC motor minimum voltage)
                             display_power = self.state.thermal_kw if self.state.turbine_speed > 50 else 0.0
-                            logger.debug(f"Sending to ESP-E: Thermal={self.state.thermal_kw:.1f}kW (Display={display_power:.1f}kW, Turbine={self.state.turbine_speed:.1f}%), Pumps: P={self.state.pump_primary_status} S={self.state.pump_secondary_status} T={self.state.pump_tertiary_status}")
+                            logger.debug("Sending to ESP-E: Thermal=%.1fkW (Display=%.1fkW, Turbine=%.1f%%), Pumps: P=%d S=%d T=%d",
+                                         self.state.thermal_kw, display_power, self.state.turbine_speed,
+                                         self.state.pump_primary_status, self.state.pump_secondary_status,
+                                         self.state.pump_tertiary_status)
                             self.uart_master.update_esp_e(
                                 thermal_power_kw=display_power,
                                 pump_primary_status=self.state.pump_primary_status,
@@ -1253,12 +1227,10 @@ class PLTNPanelController:
                             logger.debug("✓ ESP-E update success")
                             last_esp_e_update = current_time
                         except Exception as e:
-                            logger.debug(f"ESP-E communication error (non-critical): {e}")
+                            logger.debug("ESP-E communication error (non-critical): %s", e)
                 
             except Exception as e:
-                logger.error(f"Error in ESP communication thread: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"Error in ESP communication thread: {e}")
                 time.sleep(0.1)
         
         logger.info("ESP communication thread stopped")
@@ -1284,27 +1256,43 @@ class PLTNPanelController:
                     loop_count = 0
                 
             except Exception as e:
-                logger.error(f"Error in button polling thread: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"Error in button polling thread: {e}")
                 time.sleep(0.05)
         
         logger.info("Button polling thread stopped")
     
+    def _queue_hold_event(self, event: ButtonEvent):
+        """
+        Queue a hold-repeat event, dropping it if the processor is behind
+        
+        A held button re-fires every 50ms anyway, so stale repeats are
+        coalesced instead of piling up (which would keep moving rods/pressure
+        after release and delay EMERGENCY/RESET events behind them).
+        
+        Args:
+            event: ButtonEvent for the held button
+        """
+        if self.button_event_queue.qsize() >= HOLD_EVENT_BACKLOG:
+            return
+        try:
+            self.button_event_queue.put_nowait(event)
+        except Full:
+            pass
+    
     def button_hold_thread(self):
         """Thread for detecting held buttons (rod and pressure control)"""
         logger.info("Button hold detection thread started")
         
-        # Define which buttons support hold
-        HOLD_BUTTONS = {
-            ButtonPin.SAFETY_ROD_UP,
-            ButtonPin.SAFETY_ROD_DOWN,
-            ButtonPin.SHIM_ROD_UP,
-            ButtonPin.SHIM_ROD_DOWN,
-            ButtonPin.REGULATING_ROD_UP,
-            ButtonPin.REGULATING_ROD_DOWN,
-            ButtonPin.PRESSURE_UP,
-            ButtonPin.PRESSURE_DOWN
+        # Hold-supported buttons and the event each one queues
+        HOLD_EVENTS = {
+            ButtonPin.SAFETY_ROD_UP: ButtonEvent.SAFETY_ROD_UP,
+            ButtonPin.SAFETY_ROD_DOWN: ButtonEvent.SAFETY_ROD_DOWN,
+            ButtonPin.SHIM_ROD_UP: ButtonEvent.SHIM_ROD_UP,
+            ButtonPin.SHIM_ROD_DOWN: ButtonEvent.SHIM_ROD_DOWN,
+            ButtonPin.REGULATING_ROD_UP: ButtonEvent.REGULATING_ROD_UP,
+            ButtonPin.REGULATING_ROD_DOWN: ButtonEvent.REGULATING_ROD_DOWN,
+            ButtonPin.PRESSURE_UP: ButtonEvent.PRESSURE_UP,
+            ButtonPin.PRESSURE_DOWN: ButtonEvent.PRESSURE_DOWN,
         }
         
         while self.state.running:
@@ -1312,32 +1300,16 @@ class PLTNPanelController:
                 # Check which buttons are held (50ms interval)
                 pressed = self.button_manager.check_hold_buttons(hold_interval=0.05)
                 
-                # Process only hold-supported buttons
-                for pin in pressed & HOLD_BUTTONS:
-                    # Queue event for held button
-                    if pin == ButtonPin.SAFETY_ROD_UP:
-                        self.button_event_queue.put(ButtonEvent.SAFETY_ROD_UP)
-                    elif pin == ButtonPin.SAFETY_ROD_DOWN:
-                        self.button_event_queue.put(ButtonEvent.SAFETY_ROD_DOWN)
-                    elif pin == ButtonPin.SHIM_ROD_UP:
-                        self.button_event_queue.put(ButtonEvent.SHIM_ROD_UP)
-                    elif pin == ButtonPin.SHIM_ROD_DOWN:
-                        self.button_event_queue.put(ButtonEvent.SHIM_ROD_DOWN)
-                    elif pin == ButtonPin.REGULATING_ROD_UP:
-                        self.button_event_queue.put(ButtonEvent.REGULATING_ROD_UP)
-                    elif pin == ButtonPin.REGULATING_ROD_DOWN:
-                        self.button_event_queue.put(ButtonEvent.REGULATING_ROD_DOWN)
-                    elif pin == ButtonPin.PRESSURE_UP:
-                        self.button_event_queue.put(ButtonEvent.PRESSURE_UP)
-                    elif pin == ButtonPin.PRESSURE_DOWN:
-                        self.button_event_queue.put(ButtonEvent.PRESSURE_DOWN)
+                # Queue event for each held hold-supported button
+                for pin in pressed:
+                    event = HOLD_EVENTS.get(pin)
+                    if event is not None:
+                        self._queue_hold_event(event)
                 
                 time.sleep(0.01)  # 10ms polling (same as button_polling)
                 
             except Exception as e:
-                logger.error(f"Error in button hold thread: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"Error in button hold thread: {e}")
                 time.sleep(0.05)
         
         logger.info("Button hold detection thread stopped")
@@ -1362,23 +1334,27 @@ class PLTNPanelController:
         
         while self.state.running:
             try:
+                # Snapshot state under lock, render outside lock
+                # (I2C rendering 9 OLEDs is slow - don't block control/button threads)
                 with self.state_lock:
-                    if first_update:
-                        # FIRST UPDATE: Sync interpolators to current state and force display update
-                        # This clears the "Siap" startup screen and shows actual values
-                        logger.info("OLED Thread: Performing first update to clear startup screen...")
-                        self.oled_manager.sync_interpolators_to_state(self.state)
-                        first_update = False
-                        logger.info("OLED Thread: First update complete, entering normal update loop")
-                    else:
-                        # NORMAL UPDATE: Update all 9 OLED displays with smooth interpolation
-                        self.oled_manager.update_all(self.state)
+                    snapshot = replace(self.state)
+                
+                if first_update:
+                    # FIRST UPDATE: Sync interpolators to current state and force display update
+                    # This clears the "Siap" startup screen and shows actual values
+                    logger.info("OLED Thread: Performing first update to clear startup screen...")
+                    self.oled_manager.sync_interpolators_to_state(snapshot)
+                    first_update = False
+                    logger.info("OLED Thread: First update complete, entering normal update loop")
+                else:
+                    # NORMAL UPDATE: Update all 9 OLED displays with smooth interpolation
+                    self.oled_manager.update_all(snapshot)
                 
-                time.sleep(0.1)  # 100ms update rate (10Hz for smooth interpolation)
+                self.stop_event.wait(0.1)  # 100ms update rate (10Hz for smooth interpolation)
                 
             except Exception as e:
                 # Don't spam logs with OLED errors - it's not critical
-                logger.debug(f"OLED update error: {e}")
+                logger.debug("OLED update error: %s", e)
                 time.sleep(0.5)  # Slower retry on error
         
         logger.info("OLED update thread stopped")
@@ -1399,7 +1375,7 @@ class PLTNPanelController:
         while self.state.running:
             # Wait for auto simulation to be triggered
             if not self.state.auto_sim_running:
-                time.sleep(0.5)
+                self.stop_event.wait(0.5)
                 continue
             
             try:
@@ -1751,13 +1727,15 @@ class PLTNPanelController:
                 logger.info("✅ REACTOR AT STABLE OPERATION")
                 logger.info("")
                 logger.info(f"   📊 Current Status:")
+                # Copy values under lock, log outside it
                 with self.state_lock:
-                    logger.info(f"   • Pressure: {self.state.pressure:.1f} bar")
-                    logger.info(f"   • Control Rods: Shim={self.state.shim_rod}%, Reg={self.state.regulating_rod}%")
-                    logger.info(f"   • Safety Rod: {self.state.safety_rod}% (for SCRAM)")
-                    logger.info(f"   • Pumps: Primary={self.state.pump_primary_status}, "
-                              f"Secondary={self.state.pump_secondary_status}, "
-                              f"Tertiary={self.state.pump_tertiary_status}")
+                    status = replace(self.state)
+                logger.info(f"   • Pressure: {status.pressure:.1f} bar")
+                logger.info(f"   • Control Rods: Shim={status.shim_rod}%, Reg={status.regulating_rod}%")
+                logger.info(f"   • Safety Rod: {status.safety_rod}% (for SCRAM)")
+                logger.info(f"   • Pumps: Primary={status.pump_primary_status}, "
+                          f"Secondary={status.pump_secondary_status}, "
+                          f"Tertiary={status.pump_tertiary_status}")
                 logger.info(f"   • Turbine: Running at full speed")
                 logger.info(f"   • Power Output: ~200-250 MWe")
                 logger.info("")
@@ -1780,9 +1758,7 @@ class PLTNPanelController:
                 logger.info("   Mode: MANUAL (operator control active)")
                 
             except Exception as e:
-                logger.error(f"❌ Error in auto simulation: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
+                logger.exception(f"❌ Error in auto simulation: {e}")
                 with self.state_lock:
                     self.state.auto_sim_running = False
                     self.state.simulation_mode = 'manual'
@@ -1813,13 +1789,15 @@ class PLTNPanelController:
             threading.Thread(target=self.state_export_thread, daemon=True, name="StateExportThread")  # NEW for video display
         ]
         
+        self.threads = threads
         for t in threads:
             t.start()
             logger.info(f"Thread started: {t.name}")
         
         try:
             while self.state.running:
-                time.sleep(1.0)
+                if self.stop_event.wait(1.0):
+                    break
                 
                 # Print status every second
                 with self.state_lock:
@@ -1862,8 +1840,7 @@ class PLTNPanelController:
         #     logger.error(f"Initial health check error: {e}")
         
         # Thread stays alive but does nothing (just sleeps)
-        while self.state.running:
-            time.sleep(60.0)  # Just keep thread alive
+        self.stop_event.wait()  # Just keep thread alive until shutdown
         
         logger.info("Health monitoring thread stopped")
     
@@ -1897,10 +1874,16 @@ class PLTNPanelController:
                             "emergency": bool(self.state.emergency_active)
                         }
                     
+                    # Encode outside the lock (same indented layout either way)
+                    if ORJSON_AVAILABLE:
+                        payload = orjson.dumps(state_dict, option=orjson.OPT_INDENT_2)
+                    else:
+                        payload = json.dumps(state_dict, indent=2).encode('utf-8')
+                    
                     # Write to file (atomic write with temp file)
                     temp_file = self.state_export_file.with_suffix('.tmp')
-                    with open(temp_file, 'w') as f:
-                        json.dump(state_dict, f, indent=2)
+                    with open(temp_file, 'wb') as f:
+                        f.write(payload)
                     
                     # Atomic rename (prevents partial reads)
                     temp_file.replace(self.state_export_file)
@@ -1909,7 +1892,7 @@ class PLTNPanelController:
                     logger.error(f"State export error: {e}")
                 
                 # Update rate: 100ms = 10 Hz (sufficient for UI)
-                time.sleep(0.1)
+                self.stop_event.wait(0.1)
         
         except Exception as e:
             logger.error(f"State export thread crashed: {e}")
@@ -1922,9 +1905,14 @@ class PLTNPanelController:
         logger.info("Shutting down PLTN Panel Controller...")
         logger.info("="*60)
         
-        # Stop all threads
+        # Stop all threads: wake anything waiting on stop_event / ESP trigger,
+        # then give them up to 1s in total to exit (all are daemon threads)
         self.state.running = False
-        time.sleep(0.5)  # Give threads time to exit
+        self.stop_event.set()
+        self.esp_send_immediate.set()
+        deadline = time.time() + 1.0
+        for t in self.threads:
+            t.join(timeout=max(0.0, deadline - time.time()))
         
         # Cleanup in reverse order of initialization
         try:
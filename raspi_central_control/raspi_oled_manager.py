@@ -2,11 +2,16 @@
 OLED Display Manager
 Manages 4 OLED displays through TCA9548A multiplexer
 With smooth value interpolation for better UX
+
+Refresh time is bounded by the I2C clock: set dtparam=i2c_arm_baudrate=400000
+in /boot/config.txt (TCA9548A max is 400 kHz) - see raspi_README.md
 """
 
 import logging
 from PIL import Image, ImageDraw, ImageFont
 import time
+import threading
+import queue
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +150,8 @@ class OLEDDisplay:
             self.font_xlarge = ImageFont.load_default()
         
         self.initialized = False
+        self.last_frame = None  # Bytes of last frame pushed to hardware (for diff)
+        self.text_width_cache = {}  # (text, font) -> width in pixels
     
     def init_hardware(self, i2c, address: int = 0x3C, timeout: float = 1.0):
         """
@@ -159,9 +166,6 @@ class OLEDDisplay:
             logger.warning("Hardware display not available")
             return False
         
-        import threading
-        import queue
-        
         result_queue = queue.Queue()
         
         def try_init():
@@ -202,8 +206,15 @@ class OLEDDisplay:
         """Draw centered text"""
         if font is None:
             font = self.font
-        bbox = self.draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
+        # Labels repeat every cycle, so measure each (text, font) only once
+        key = (text, font)
+        text_width = self.text_width_cache.get(key)
+        if text_width is None:
+            if len(self.text_width_cache) >= 256:
+                self.text_width_cache.clear()  # Bound memory for changing values
+            bbox = self.draw.textbbox((0, 0), text, font=font)
+            text_width = bbox[2] - bbox[0]
+            self.text_width_cache[key] = text_width
         x = (self.width - text_width) // 2
         self.draw.text((x, y), text, font=font, fill=255)
     
@@ -228,14 +239,25 @@ class OLEDDisplay:
                 self.draw.rectangle((x + 1, y + 1, x + 1 + fill_width, y + height - 1), 
                                   outline=255, fill=255)
     
-    def show(self):
-        """Update display"""
+    def show(self) -> bool:
+        """
+        Update display (skipped if frame is identical to last one pushed)
+        
+        Returns:
+            True if frame was written to hardware, False otherwise
+        """
         if self.initialized and self.device:
+            frame = self.image.tobytes()
+            if frame == self.last_frame:
+                return False  # No pixel changed, skip I2C transfer
             try:
                 self.device.image(self.image)
                 self.device.show()
+                self.last_frame = frame
+                return True
             except Exception as e:
                 logger.error(f"Failed to update display: {e}")
+        return False
 
 
 class OLEDManager:
@@ -347,8 +369,7 @@ class OLEDManager:
             logger.info("Initializing OLEDs on TCA9548A #1 (0x70)...")
             for channel, display, name in displays_mux1:
                 try:
-                    self.mux.select_display_channel(channel)
-                    time.sleep(0.05)  # Minimal delay
+                    self.mux.select_display_channel(channel)  # 10ms settle inside
                     
                     # Try to initialize with 0.5s timeout per display
                     if display.init_hardware(i2c, 0x3C, timeout=0.5):
@@ -371,8 +392,7 @@ class OLEDManager:
             for channel, display, name in displays_mux2:
                 try:
                     # Use esp_channel to access second multiplexer (0x71)
-                    self.mux.select_esp_channel(channel)
-                    time.sleep(0.05)  # Minimal delay
+                    self.mux.select_esp_channel(channel)  # 10ms settle inside
                     
                     # Try to initialize with 0.5s timeout per display
                     if display.init_hardware(i2c, 0x3C, timeout=0.5):
@@ -430,7 +450,8 @@ class OLEDManager:
         display.clear()
         
         # Show smoothly interpolated value with large font
-        pressure_text = f"{display_pressure:.1f} bar"
+        # (interpolator already quantizes to whole bar - format as int)
+        pressure_text = f"{display_pressure}.0 bar"
         display.draw_text_centered(pressure_text, 8, display.font_xlarge)
         
         display.show()
@@ -553,8 +574,9 @@ class OLEDManager:
         display.clear()
         
         # Show smoothly interpolated power value
-        power_mwe = display_power_kw / 1000.0
-        power_text = f"{power_mwe:.1f} MWe"
+        # Integer math: kW -> tenths of MWe (rounded), no float formatting
+        whole, tenth = divmod((display_power_kw + 50) // 100, 10)
+        power_text = f"{whole}.{tenth} MWe"
         display.draw_text_centered(power_text, 8, display.font_xlarge)
         
         display.show()
@@ -801,16 +823,16 @@ class OLEDManager:
             turbine_speed: Turbine speed percentage
             emergency_active: Emergency shutdown flag
         """
-        # Select channel
-        self.mux.select_esp_channel(2)  # Use ESP channel for TCA9548A #2, Channel 2
-        
         display = self.oled_system_status
-        display.clear()
         
         # ============================================
         # EMERGENCY MODE (HIGHEST PRIORITY!)
         # ============================================
         if emergency_active:
+            self.mux.select_esp_channel(2)  # Use ESP channel for TCA9548A #2, Channel 2
+            display.clear()
+            self.last_data['system_status'] = None  # Force redraw after emergency
+            
             # Update emergency blink state (0.5 second cycle - faster for urgency)
             current_time = time.time()
             if current_time - self.emergency_blink_time > 0.5:
@@ -823,9 +845,9 @@ class OLEDManager:
                 display.draw_text_centered("SISTEM SHUTDOWN", 22, display.font_small)
             # else: Blink OFF: Display remains blank (cleared above)
             
-            display.show()
-            time.sleep(0.005)
-            time.sleep(0.010)
+            if display.show():
+                time.sleep(0.005)
+                time.sleep(0.010)
             return  # Skip normal display logic
         
         # ============================================
@@ -837,19 +859,22 @@ class OLEDManager:
             # Mode just changed - reset mode shown flag
             self.status_mode_shown = False
             self.status_last_mode = current_mode
-            logger.debug(f"System status: Mode changed to {current_mode}")
+            logger.debug("System status: Mode changed to %s", current_mode)
         
         # ============================================
         # SHOW MODE INDICATOR (ONCE ONLY)
         # ============================================
         if not self.status_mode_shown:
             # Show mode indicator only once when mode changes
+            self.mux.select_esp_channel(2)  # Use ESP channel for TCA9548A #2, Channel 2
+            display.clear()
             display.draw_text_centered(current_mode, 10, display.font_xlarge)
             display.show()
             time.sleep(0.005)
             
             # Mark as shown after first display
             self.status_mode_shown = True
+            self.last_data['system_status'] = None  # Force redraw of guidance
             return
         
         # ============================================
@@ -870,13 +895,6 @@ class OLEDManager:
                 thermal_kw,
                 pump_tertiary, pump_secondary, pump_primary
             )
-            
-            # Display line 1 (action)
-            display.draw_text_centered(line1, 8, display.font)
-            
-            # Display line 2 (progress) if not empty
-            if line2:
-                display.draw_text_centered(line2, 20, display.font_small)
         
         # ============================================
         # MANUAL MODE: Active or Idle
@@ -900,12 +918,10 @@ class OLEDManager:
                 
                 if self.status_blink_state == 0:
                     # Cycle 1: "TEKAN START / UNTUK AUTO"
-                    display.draw_text_centered("TEKAN START", 8, display.font)
-                    display.draw_text_centered("UNTUK AUTO", 20, display.font_small)
+                    line1, line2 = "TEKAN START", "UNTUK AUTO"
                 else:
                     # Cycle 2: "SIMULASI / OTOMATIS"
-                    display.draw_text_centered("SIMULASI", 8, display.font)
-                    display.draw_text_centered("OTOMATIS", 20, display.font_small)
+                    line1, line2 = "SIMULASI", "OTOMATIS"
             
             else:
                 # ============================================
@@ -915,15 +931,32 @@ class OLEDManager:
                     pressure, pump_primary, pump_secondary, pump_tertiary,
                     display_safety, display_shim, display_reg, thermal_kw
                 )
-                
-                # Display line 1 (primary instruction)
-                display.draw_text_centered(line1, 8, display.font)
-                
-                # Display line 2 (detail/target) if not empty
-                if line2:
-                    display.draw_text_centered(line2, 20, display.font_small)
         
-        display.show()
+        # OPTIMIZATION: Status is evaluated every cycle but the text rarely
+        # changes - skip channel select, render and I2C if it is the same
+        if self.last_data['system_status'] == (line1, line2):
+            return
+        
+        # === I2C COMMUNICATION (timing preserved) ===
+        self.mux.select_esp_channel(2)  # Use ESP channel for TCA9548A #2, Channel 2
+        display.clear()
+        
+        # Line 1 (action / instruction)
+        display.draw_text_centered(line1, 8, display.font)
+        
+        # Line 2 (progress / detail) if not empty
+        if line2:
+            display.draw_text_centered(line2, 20, display.font_small)
+        
+        pushed = display.show()
+        
+        # Cache the text only once the panel holds this frame (written now or
+        # identical to the last write); after a failed write, retry next cycle
+        if display.last_frame == display.image.tobytes():
+            self.last_data['system_status'] = (line1, line2)
+        
+        if not pushed:
+            return
         time.sleep(0.005)  # 5ms delay after show() - PRESERVED
         
         # Post-update delay for MUX #2
@@ -125,12 +125,12 @@ class SystemHealthMonitor:
             return
         
         try:
-            # Try to scan multiplexers
+            # Probe the multiplexers themselves; the channel scan only
+            # reports downstream devices (the mux addresses are skipped)
+            mux1_ok = panel.mux_manager.mux1.is_responding()
+            mux2_ok = panel.mux_manager.mux2.is_responding()
             scan_result = panel.mux_manager.scan_all()
             
-            mux1_ok = len(scan_result.get('mux1', {})) > 0
-            mux2_ok = len(scan_result.get('mux2', {})) > 0
-            
             if mux1_ok and mux2_ok:
                 self.components["mux"] = ComponentHealth(
                     name="I2C Multiplexers",
@@ -4,12 +4,34 @@ Manages dual TCA9548A for OLED displays and ESP slaves
 """
 
 import smbus2
+import errno
 import logging
 import time
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Known I2C device addresses (for scan logging)
+_DEVICE_NAMES = {
+    0x08: "ESP-BC",
+    0x0A: "ESP-E",
+    0x3C: "OLED",
+    0x70: "TCA9548A #1",
+    0x71: "TCA9548A #2",
+}
+
+# Addresses probed on each channel: 0x03-0x77 minus the two muxes, which sit
+# upstream and would answer on every channel
+_PROBE_ADDRS = tuple(a for a in range(0x03, 0x78) if a not in (0x70, 0x71))
+
+# errno values an adapter returns when an address is not ACKed (ENXIO per the
+# Linux i2c fault-codes doc, EREMOTEIO from i2c-bcm2835)
+_NACK_ERRNOS = (errno.ENXIO, errno.EREMOTEIO)
+
+# Max wall time for scanning one channel (a stuck SDA / missing pull-ups
+# makes every probe time out, which would otherwise stall for minutes)
+SCAN_TIMEOUT = 2.0  # seconds
+
 
 class TCA9548A:
     """
@@ -19,26 +41,29 @@ class TCA9548A:
     that share the same I2C address.
     """
     
-    def __init__(self, bus_number: int, address: int = 0x70):
+    def __init__(self, bus_number: int, address: int = 0x70,
+                 bus: Optional[smbus2.SMBus] = None):
         """
         Initialize TCA9548A multiplexer
         
         Args:
             bus_number: I2C bus number (0 or 1)
             address: I2C address of TCA9548A (default 0x70)
+            bus: Optional already-open SMBus handle to share (not closed by this instance)
         """
         self.bus_number = bus_number
         self.address = address
         self.current_channel = None
+        self.owns_bus = bus is None
         
         try:
-            self.bus = smbus2.SMBus(bus_number)
+            self.bus = smbus2.SMBus(bus_number) if bus is None else bus
             
             # Disable all channels on init (clear any previous state)
             try:
                 self.bus.write_byte(self.address, 0x00)
                 logger.debug(f"TCA9548A 0x{address:02X} channels cleared on init")
-            except:
+            except OSError:
                 pass  # Multiplexer might not be connected yet
             
             logger.info(f"TCA9548A initialized on bus {bus_number}, address 0x{address:02X}")
@@ -46,7 +71,8 @@ class TCA9548A:
             logger.error(f"Failed to initialize TCA9548A: {e}")
             raise
     
-    def select_channel(self, channel: int, force: bool = False) -> bool:
+    def select_channel(self, channel: int, force: bool = False,
+                       settle: float = 0.010) -> bool:
         """
         Select an I2C channel (0-7)
         
@@ -55,6 +81,8 @@ class TCA9548A:
         Args:
             channel: Channel number (0-7) or None to deselect
             force: Force channel selection even if already active
+            settle: Delay after switching, in seconds (OLED stability);
+                    0 for plain address probing
             
         Returns:
             True if successful, False otherwise
@@ -69,7 +97,7 @@ class TCA9548A:
         
         # Optimization: Skip if channel already selected
         if not force and self.current_channel == channel:
-            logger.debug(f"Channel {channel} already active, skipping selection")
+            logger.debug("Channel %d already active, skipping selection", channel)
             return True
         
         try:
@@ -79,9 +107,10 @@ class TCA9548A:
             self.current_channel = channel
             
             # Small delay for I2C bus to settle (prevent bus collision)
-            time.sleep(0.010)  # 10ms delay (increased for OLED stability)
+            if settle:
+                time.sleep(settle)  # 10ms default (increased for OLED stability)
             
-            logger.debug(f"Selected TCA9548A channel {channel}")
+            logger.debug("Selected TCA9548A channel %d", channel)
             return True
         except Exception as e:
             logger.error(f"Failed to select channel {channel}: {e}")
@@ -103,6 +132,54 @@ class TCA9548A:
             logger.error(f"Failed to disable channels: {e}")
             return False
     
+    def is_responding(self) -> bool:
+        """
+        Check that the multiplexer itself ACKs (reads its control register)
+        
+        Independent of what is connected downstream, so a mux with no
+        powered OLEDs still counts as present.
+        
+        Returns:
+            True if the TCA9548A answered, False otherwise
+        """
+        try:
+            self.bus.read_byte(self.address)
+            return True
+        except OSError:
+            return False
+    
+    def _probe_addresses(self, addresses, deadline: float) -> list:
+        """
+        Probe a range of I2C addresses on the currently selected channel
+        
+        Args:
+            addresses: Iterable of 7-bit addresses to probe
+            deadline: time.monotonic() value after which probing stops
+            
+        Returns:
+            List of addresses that responded
+        """
+        found = []
+        for addr in addresses:
+            if time.monotonic() > deadline:
+                logger.warning("I2C scan timeout at 0x%02X - bus stuck or missing pull-ups?", addr)
+                break
+            try:
+                # SMBus quick write (address + R/W bit only, like i2cdetect -q):
+                # fewest bus cycles per probe and ACKed by devices that
+                # refuse a plain byte read
+                self.bus.write_quick(addr)
+                found.append(addr)
+            except OSError as e:
+                # NACK - nothing at this address; anything else (timeout,
+                # arbitration lost) is a bus fault: stop this channel and
+                # keep what was found, like the deadline above
+                if e.errno not in _NACK_ERRNOS:
+                    logger.warning("I2C bus fault at 0x%02X (errno %s: %s) - stopping channel scan",
+                                   addr, e.errno, e.strerror)
+                    break
+        return found
+    
     def scan_channels(self) -> dict:
         """
         Scan all channels for connected I2C devices
@@ -111,23 +188,28 @@ class TCA9548A:
             Dictionary mapping channel numbers to list of device addresses
         """
         devices = {}
+        name_get = _DEVICE_NAMES.get
         
-        for channel in range(8):
-            if self.select_channel(channel):
-                channel_devices = []
-                # Scan I2C addresses 0x03 to 0x77
-                for addr in range(0x03, 0x78):
-                    try:
-                        self.bus.read_byte(addr)
-                        channel_devices.append(addr)
-                    except:
-                        pass
+        try:
+            for channel in range(8):
+                # Channel is connected at the STOP of the select write; no
+                # OLED settle delay is needed just to probe addresses
+                if not self.select_channel(channel, settle=0):
+                    continue
+                
+                # Scan I2C addresses 0x03 to 0x77 on the shared bus handle
+                # (transfers are serialized per adapter, threads gain nothing)
+                deadline = time.monotonic() + SCAN_TIMEOUT
+                channel_devices = self._probe_addresses(_PROBE_ADDRS, deadline)
                 
                 if channel_devices:
                     devices[channel] = channel_devices
-                    logger.info(f"Channel {channel}: {[hex(a) for a in channel_devices]}")
-        
-        self.disable_all_channels()
+                    logger.info("Channel %d: %s", channel,
+                                ", ".join("0x%02X (%s)" % (a, name_get(a, "Unknown"))
+                                          for a in channel_devices))
+        finally:
+            # Never leave a channel connected, even if the scan is interrupted
+            self.disable_all_channels()
         return devices
     
     def close(self):
@@ -136,8 +218,8 @@ class TCA9548A:
             # Disable all channels before closing
             self.disable_all_channels()
             
-            # Close bus
-            if hasattr(self, 'bus'):
+            # Close bus (only if this instance opened it)
+            if hasattr(self, 'bus') and self.owns_bus:
                 self.bus.close()
             
             logger.info("TCA9548A closed")
@@ -172,7 +254,10 @@ class DualMultiplexerManager:
             esp_addr: Address of TCA9548A #2 (default 0x71)
         """
         self.mux1 = TCA9548A(display_bus, display_addr)  # TCA9548A #1 (0x70)
-        self.mux2 = TCA9548A(esp_bus, esp_addr)          # TCA9548A #2 (0x71)
+        
+        # Share one SMBus handle when both MUX are on the same bus
+        shared_bus = self.mux1.bus if esp_bus == display_bus else None
+        self.mux2 = TCA9548A(esp_bus, esp_addr, bus=shared_bus)  # TCA9548A #2 (0x71)
         self.mux1_addr = display_addr
         self.mux2_addr = esp_addr
         self.last_mux = None  # Track which MUX was last used (1 or 2)
@@ -212,6 +297,10 @@ class DualMultiplexerManager:
             logger.error(f"Invalid display channel: {channel}. Must be 1-7 for MUX #1")
             return False
         
+        # Fast path: same OLED as last time, nothing to write on the bus
+        if self.last_mux == 1 and self.mux1.current_channel == channel:
+            return True
+        
         # CRITICAL FIX: Disable MUX #2 before activating MUX #1
         # This prevents I2C bus collision when both MUX have active channels
         if self.last_mux == 2:
@@ -219,7 +308,7 @@ class DualMultiplexerManager:
             time.sleep(0.015)  # 15ms delay when switching between MUX (increased for stability)
         
         # Direct mapping: channel 1-7 → MUX #1 channels 1-7
-        logger.debug(f"OLED #{channel} → MUX #1 (0x{self.mux1_addr:02X}), Channel {channel}")
+        logger.debug("OLED #%d → MUX #1 (0x%02X), Channel %d", channel, self.mux1_addr, channel)
         
         # FORCE re-selection after MUX switch to ensure clean state
         force_select = (self.last_mux == 2)
@@ -244,6 +333,10 @@ class DualMultiplexerManager:
             logger.error(f"Invalid MUX #2 channel: {channel}. Must be 0-2")
             return False
         
+        # Fast path: same channel as last time, nothing to write on the bus
+        if self.last_mux == 2 and self.mux2.current_channel == channel:
+            return True
+        
         # CRITICAL FIX: Disable MUX #1 before activating MUX #2
         # This prevents I2C bus collision when both MUX have active channels
         if self.last_mux == 1:
@@ -251,9 +344,9 @@ class DualMultiplexerManager:
             time.sleep(0.015)  # 15ms delay when switching between MUX (increased for stability)
         
         if channel == 0:
-            logger.debug(f"ESP-E → MUX #2 (0x{self.mux2_addr:02X}), Channel 0")
+            logger.debug("ESP-E → MUX #2 (0x%02X), Channel 0", self.mux2_addr)
         else:
-            logger.debug(f"OLED #{channel + 7} → MUX #2 (0x{self.mux2_addr:02X}), Channel {channel}")
+            logger.debug("OLED #%d → MUX #2 (0x%02X), Channel %d", channel + 7, self.mux2_addr, channel)
         
         # FORCE re-selection after MUX switch to ensure clean state
         force_select = (self.last_mux == 1)
@@ -281,12 +374,13 @@ class DualMultiplexerManager:
             # Disable all channels on both multiplexers
             logger.info("Closing multiplexers and disabling all channels...")
             
-            if hasattr(self, 'mux1'):
-                self.mux1.close()
-            
+            # Close MUX #2 first - it may share MUX #1's bus handle
             if hasattr(self, 'mux2'):
                 self.mux2.close()
             
+            if hasattr(self, 'mux1'):
+                self.mux1.close()
+            
             logger.info("Dual multiplexer manager closed")
         except Exception as e:
             logger.error(f"Error closing multiplexer manager: {e}")
@@ -20,7 +20,7 @@ import json
 import time
 import logging
 import struct
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, Tuple, NamedTuple
 from dataclasses import dataclass
 import threading
 
@@ -44,16 +44,44 @@ USE_BINARY_PROTOCOL = True  # Set to False to use legacy JSON protocol
 MAX_RETRIES = 3
 RETRY_DELAYS = [0.03, 0.05, 0.1]  # Optimized: 30ms, 50ms, 100ms (was 50ms, 100ms, 200ms)
 
+# Hex dump lookup for TX/RX logging ("%02X" per byte value, built once;
+# bytes.hex(sep) would do this in C but needs Python 3.8)
+_HEX_BYTE = tuple('%02X' % value for value in range(256))
+
+# Precompiled payload layouts (little-endian, no padding - matches ESP32 firmware)
+ESP_E_UPDATE_STRUCT = struct.Struct('<fBBB')                # thermal_kw + 3 pump status
+ESP_BC_RESPONSE_STRUCT = struct.Struct('<BBBfHBHHHHBBBB')   # rods, kw, power, state, turbine, pumps, humid
+ESP_E_RESPONSE_STRUCT = struct.Struct('<fBBBB')             # power_mwe, pwm, 3 pump status
+
 
 # ============================================
 # CRC8 Checksum (CRC-8/MAXIM)
 # ============================================
+def _crc8_table() -> bytes:
+    """Build the 256-entry CRC-8 (poly 0x31) lookup table, one entry per byte value"""
+    table = bytearray(256)
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            if crc & 0x80:
+                crc = (crc << 1) ^ 0x31
+            else:
+                crc = crc << 1
+            crc &= 0xFF
+        table[value] = crc
+    return bytes(table)
+
+
+_CRC8_TABLE = _crc8_table()
+
+
 def crc8_maxim(data: bytes) -> int:
     """
     Calculate CRC-8/MAXIM checksum
     
     Polynomial: 0x31
     Initial value: 0x00
+    Uses a precomputed table (one lookup per byte instead of 8 shift steps)
     
     Args:
         data: Bytes to checksum
@@ -62,14 +90,9 @@ def crc8_maxim(data: bytes) -> int:
         CRC8 checksum (0-255)
     """
     crc = 0x00
+    table = _CRC8_TABLE
     for byte in data:
-        crc ^= byte
-        for _ in range(8):
-            if crc & 0x80:
-                crc = (crc << 1) ^ 0x31
-            else:
-                crc = crc << 1
-            crc &= 0xFF
+        crc = table[crc ^ byte]
     return crc
 
 
@@ -129,6 +152,10 @@ class ESP_E_Data:
 # Binary Protocol Encoders
 # ============================================
 
+# Ping has no payload, so the frame is constant - build it once at import
+_PING_FRAME = bytes([STX, CMD_PING, 0, crc8_maxim(bytes([CMD_PING, 0])), ETX])
+
+
 def encode_ping_command() -> bytes:
     """
     Encode ping command
@@ -137,13 +164,9 @@ def encode_ping_command() -> bytes:
     Total: 5 bytes
     
     Returns:
-        Binary message bytes
+        Binary message bytes (precomputed constant frame)
     """
-    cmd = CMD_PING
-    length = 0  # No payload
-    crc_data = bytes([cmd, length])
-    crc = crc8_maxim(crc_data)
-    return bytes([STX, cmd, length, crc, ETX])
+    return _PING_FRAME
 
 
 def encode_esp_bc_update(rods: list, pumps: list, humid: list) -> bytes:
@@ -175,15 +198,15 @@ def encode_esp_bc_update(rods: list, pumps: list, humid: list) -> bytes:
     h3 = 1 if int(humid[2]) != 0 else 0
     h4 = 1 if int(humid[3]) != 0 else 0
     
-    cmd = CMD_UPDATE
-    payload = bytes([rod1, rod2, rod3, pump1, pump2, pump3, h1, h2, h3, h4])
-    length = len(payload)  # 10 bytes
+    # Build the whole frame in one buffer; CRC slot (index 13) filled below
+    frame = bytearray((STX, CMD_UPDATE, 10,
+                       rod1, rod2, rod3, pump1, pump2, pump3, h1, h2, h3, h4,
+                       0x00, ETX))
     
     # CRC over CMD + LEN + PAYLOAD
-    crc_data = bytes([cmd, length]) + payload
-    crc = crc8_maxim(crc_data)
+    frame[13] = crc8_maxim(memoryview(frame)[1:13])
     
-    return bytes([STX, cmd, length]) + payload + bytes([crc, ETX])
+    return bytes(frame)
 
 
 def encode_esp_e_update(thermal_kw: float, pump_primary: int, pump_secondary: int, pump_tertiary: int) -> bytes:
@@ -202,23 +225,26 @@ def encode_esp_e_update(thermal_kw: float, pump_primary: int, pump_secondary: in
     Returns:
         Binary message bytes
     """
-    cmd = CMD_UPDATE
+    length = ESP_E_UPDATE_STRUCT.size  # 7
+    frame = bytearray(length + 5)
+    frame[0] = STX
+    frame[1] = CMD_UPDATE
+    frame[2] = length
     
-    # Pack thermal_kw (4 bytes) + 3 pump status bytes (1 byte each)
-    payload = struct.pack('<f', thermal_kw)  # 4 bytes
-    payload += bytes([
+    # Pack thermal_kw (4 bytes) + 3 pump status bytes (1 byte each) in place
+    ESP_E_UPDATE_STRUCT.pack_into(
+        frame, 3,
+        thermal_kw,
         max(0, min(3, int(pump_primary))),
         max(0, min(3, int(pump_secondary))),
         max(0, min(3, int(pump_tertiary)))
-    ])  # 3 bytes
-    
-    length = len(payload)  # 7
+    )
     
     # CRC over CMD + LEN + PAYLOAD
-    crc_data = bytes([cmd, length]) + payload
-    crc = crc8_maxim(crc_data)
+    frame[3 + length] = crc8_maxim(memoryview(frame)[1:3 + length])
+    frame[4 + length] = ETX
     
-    return bytes([STX, cmd, length]) + payload + bytes([crc, ETX])
+    return bytes(frame)
 
 
 # ============================================
@@ -273,7 +299,18 @@ def decode_binary_response(data: bytes) -> Tuple[Optional[int], Optional[int], O
     return length, msg_type, payload
 
 
-def decode_esp_bc_response(payload: bytes) -> Optional[Dict]:
+class ESP_BC_Response(NamedTuple):
+    """Decoded ESP-BC response (attribute access, no dict hashing)"""
+    rods: Tuple[int, int, int]
+    thermal_kw: float
+    power_level: float
+    state: int
+    turbine_speed: float
+    pump_speeds: Tuple[float, float, float]
+    humid_status: Tuple[int, int, int, int]
+
+
+def decode_esp_bc_response(payload: bytes) -> Optional[ESP_BC_Response]:
     """
     Decode ESP-BC response payload
     
@@ -284,38 +321,26 @@ def decode_esp_bc_response(payload: bytes) -> Optional[Dict]:
         payload: Response payload bytes
         
     Returns:
-        Dictionary with decoded data or None if invalid
+        ESP_BC_Response with decoded data or None if invalid
     """
     if len(payload) < 23:
         logger.error(f"ESP-BC payload too short: {len(payload)} bytes (expected 23)")
         return None
     
     try:
-        # Unpack fixed-size fields
-        rod1 = payload[0]
-        rod2 = payload[1]
-        rod3 = payload[2]
-        thermal_kw = struct.unpack('<f', payload[3:7])[0]
-        power_lvl = struct.unpack('<H', payload[7:9])[0] / 100.0  # uint16 → float (0.00-100.00)
-        state = payload[9]
-        turb_spd = struct.unpack('<H', payload[10:12])[0] / 100.0
-        pump1 = struct.unpack('<H', payload[12:14])[0] / 100.0
-        pump2 = struct.unpack('<H', payload[14:16])[0] / 100.0
-        pump3 = struct.unpack('<H', payload[16:18])[0] / 100.0
-        h1 = payload[18]
-        h2 = payload[19]
-        h3 = payload[20]
-        h4 = payload[21]
+        # Unpack all fixed-size fields in one call (uint16 values are x100)
+        (rod1, rod2, rod3, thermal_kw, power_lvl, state, turb_spd,
+         pump1, pump2, pump3, h1, h2, h3, h4) = ESP_BC_RESPONSE_STRUCT.unpack_from(payload)
         
-        return {
-            'rods': [rod1, rod2, rod3],
-            'thermal_kw': thermal_kw,
-            'power_level': power_lvl,
-            'state': state,
-            'turbine_speed': turb_spd,
-            'pump_speeds': [pump1, pump2, pump3],
-            'humid_status': [h1, h2, h3, h4]
-        }
+        return ESP_BC_Response(
+            rods=(rod1, rod2, rod3),
+            thermal_kw=thermal_kw,
+            power_level=power_lvl / 100.0,  # uint16 → float (0.00-100.00)
+            state=state,
+            turbine_speed=turb_spd / 100.0,
+            pump_speeds=(pump1 / 100.0, pump2 / 100.0, pump3 / 100.0),
+            humid_status=(h1, h2, h3, h4)
+        )
     except Exception as e:
         logger.error(f"Error decoding ESP-BC response: {e}")
         return None
@@ -339,11 +364,8 @@ def decode_esp_e_response(payload: bytes) -> Optional[Dict]:
         return None
     
     try:
-        power_mwe = struct.unpack('<f', payload[0:4])[0]
-        pwm = payload[4]
-        pump_primary = payload[5]
-        pump_secondary = payload[6]
-        pump_tertiary = payload[7]
+        (power_mwe, pwm, pump_primary,
+         pump_secondary, pump_tertiary) = ESP_E_RESPONSE_STRUCT.unpack_from(payload)
         
         return {
             'power_mwe': power_mwe,
@@ -405,6 +427,9 @@ class UARTDevice:
             
         except Exception as e:
             logger.error(f"❌ Failed to open {self.port}: {e}")
+            # Release the port if it opened but setup failed, so a retry can reopen it
+            if self.serial is not None and self.serial.is_open:
+                self.serial.close()
             return False
     
     def disconnect(self):
@@ -666,12 +691,15 @@ class UARTDevice:
                     
                     # Send command all at once (not byte-by-byte)
                     # Byte-by-byte with 1ms delay was causing buffer issues on ESP
+                    # No flush() (tcdrain): a <=15 byte frame drains in ~1.3ms at
+                    # 115200 baud, well inside the 30ms processing wait below
                     self.serial.write(command_bytes)
-                    self.serial.flush()
                     
-                    # Log TX (hex dump for binary data)
-                    hex_str = ' '.join(f'{b:02X}' for b in command_bytes)
-                    logger.info(f"TX {self.port} (attempt {attempt+1}/{MAX_RETRIES}): [{hex_str}] ({len(command_bytes)} bytes)")
+                    # Log TX (hex dump for binary data) - only build hex string if INFO enabled
+                    if logger.isEnabledFor(logging.INFO):
+                        hex_str = ' '.join(map(_HEX_BYTE.__getitem__, command_bytes))
+                        logger.info("TX %s (attempt %d/%d): [%s] (%d bytes)",
+                                    self.port, attempt + 1, MAX_RETRIES, hex_str, len(command_bytes))
                     
                     # Wait for ESP to process and start transmitting
                     time.sleep(0.030)  # 30ms for ESP processing
@@ -680,28 +708,13 @@ class UARTDevice:
                     old_timeout = self.serial.timeout
                     self.serial.timeout = timeout
                     
-                    # Read until ETX (0x03) - more robust than fixed length
-                    # This ensures we get the complete message regardless of timing
-                    response_data = b''
-                    max_bytes = 50  # Safety limit (max expected is 28 bytes)
-                    start_time = time.time()
-                    
-                    while len(response_data) < max_bytes:
-                        # Check timeout
-                        if time.time() - start_time > timeout:
-                            logger.warning(f"Timeout waiting for ETX from {self.port}")
-                            break
-                        
-                        # Read one byte at a time
-                        byte = self.serial.read(1)
-                        if byte:
-                            response_data += byte
-                            # Check if we got ETX (end of message)
-                            if byte[0] == ETX:
-                                break
-                        else:
-                            # No data available, wait a bit
-                            time.sleep(0.005)  # 5ms
+                    # Length-framed read: [STX][TYPE][LEN] header first, then
+                    # exactly LEN payload bytes + CRC + ETX. Two bulk reads instead
+                    # of one read(1) syscall per byte, and a 0x03 byte inside the
+                    # payload or CRC no longer ends the frame early
+                    response_data = self.serial.read(3)
+                    if len(response_data) == 3 and response_data[0] == STX:
+                        response_data += self.serial.read(response_data[2] + 2)
                     
                     # Restore timeout
                     self.serial.timeout = old_timeout
@@ -725,9 +738,10 @@ class UARTDevice:
                             self.error_count += 1
                             return None
                     
-                    # Log RX (hex dump)
-                    hex_str_rx = ' '.join(f'{b:02X}' for b in response_data)
-                    logger.info(f"RX {self.port}: [{hex_str_rx}] ({len(response_data)} bytes)")
+                    # Log RX (hex dump) - only build hex string if INFO enabled
+                    if logger.isEnabledFor(logging.INFO):
+                        hex_str_rx = ' '.join(map(_HEX_BYTE.__getitem__, response_data))
+                        logger.info("RX %s: [%s] (%d bytes)", self.port, hex_str_rx, len(response_data))
                     
                     # Decode response
                     length, msg_type, payload = decode_binary_response(response_data)
@@ -787,7 +801,7 @@ class UARTDevice:
                     # Add safety margin for processing
                     time.sleep(0.030)  # 30ms inter-message delay
                     
-                    logger.debug(f"✓ Binary communication successful with {self.port}")
+                    logger.debug("✓ Binary communication successful with %s", self.port)
                     return length, msg_type, payload
                     
                 except Exception as e:
@@ -845,14 +859,17 @@ class UARTMaster:
         self.esp_bc_data = ESP_BC_Data()
         self.esp_e_data = ESP_E_Data()
         
-        # Connect devices
+        # Connect devices - open both ports first so a single stabilization
+        # delay covers both ESPs instead of waiting for each one in turn
         self.esp_bc_connected = self.esp_bc.connect()
-        self.esp_e_connected = False
+        self.esp_e_connected = self.esp_e.connect() if self.esp_e_enabled else False
         
         # Additional stabilization delay after connection (critical for reliability)
-        if self.esp_bc_connected:
+        if self.esp_bc_connected or self.esp_e_connected:
             logger.info("⏳ Waiting 1 second for ESP32 to stabilize...")
             time.sleep(1.0)
+        
+        if self.esp_bc_connected:
             # Handshake ping to ensure ESP firmware ready
             try:
                 if USE_BINARY_PROTOCOL:
@@ -887,10 +904,7 @@ class UARTMaster:
             logger.error(f"❌ ESP-BC: {esp_bc_port} - NOT CONNECTED!")
         
         if self.esp_e_enabled:
-            self.esp_e_connected = self.esp_e.connect()
             if self.esp_e_connected:
-                logger.info("⏳ Waiting 1 second for ESP32 to stabilize...")
-                time.sleep(1.0)
                 # Handshake ping to ensure ESP-E firmware ready
                 try:
                     if USE_BINARY_PROTOCOL:
@@ -990,29 +1004,23 @@ class UARTMaster:
                 return False
             
             # Update internal state from response
-            self.esp_bc_data.safety_actual = response_data['rods'][0]
-            self.esp_bc_data.shim_actual = response_data['rods'][1]
-            self.esp_bc_data.regulating_actual = response_data['rods'][2]
+            data = self.esp_bc_data
+            data.safety_actual, data.shim_actual, data.regulating_actual = response_data.rods
             
-            self.esp_bc_data.kw_thermal = response_data['thermal_kw']
-            self.esp_bc_data.power_level = response_data['power_level']
-            self.esp_bc_data.state = response_data['state']
-            self.esp_bc_data.turbine_speed = response_data['turbine_speed']
+            data.kw_thermal = response_data.thermal_kw
+            data.power_level = response_data.power_level
+            data.state = response_data.state
+            data.turbine_speed = response_data.turbine_speed
             
-            self.esp_bc_data.pump_primary_speed = response_data['pump_speeds'][0]
-            self.esp_bc_data.pump_secondary_speed = response_data['pump_speeds'][1]
-            self.esp_bc_data.pump_tertiary_speed = response_data['pump_speeds'][2]
+            data.pump_primary_speed, data.pump_secondary_speed, data.pump_tertiary_speed = response_data.pump_speeds
             
-            self.esp_bc_data.humid_ct1_status = response_data['humid_status'][0]
-            self.esp_bc_data.humid_ct2_status = response_data['humid_status'][1]
-            self.esp_bc_data.humid_ct3_status = response_data['humid_status'][2]
-            self.esp_bc_data.humid_ct4_status = response_data['humid_status'][3]
+            (data.humid_ct1_status, data.humid_ct2_status,
+             data.humid_ct3_status, data.humid_ct4_status) = response_data.humid_status
             
-            logger.debug(f"ESP-BC: Rods={response_data['rods']}, "
-                        f"Thermal={self.esp_bc_data.kw_thermal:.1f}kW, "
-                        f"Pumps=[{self.esp_bc_data.pump_primary_speed:.1f}%, "
-                        f"{self.esp_bc_data.pump_secondary_speed:.1f}%, "
-                        f"{self.esp_bc_data.pump_tertiary_speed:.1f}%]")
+            logger.debug("ESP-BC: Rods=%s, Thermal=%.1fkW, Pumps=[%.1f%%, %.1f%%, %.1f%%]",
+                         list(response_data.rods), data.kw_thermal,
+                         data.pump_primary_speed, data.pump_secondary_speed,
+                         data.pump_tertiary_speed)
             return True
         
         else:
@@ -1114,9 +1122,10 @@ class UARTMaster:
             self.esp_e_data.power_mwe = response_data['power_mwe']
             self.esp_e_data.pwm = response_data['pwm']
             
-            logger.debug(f"ESP-E: Power={self.esp_e_data.power_mwe:.1f} MWe, "
-                        f"PWM={self.esp_e_data.pwm}/255, "
-                        f"Pumps: P={response_data['pump_primary']} S={response_data['pump_secondary']} T={response_data['pump_tertiary']}")
+            logger.debug("ESP-E: Power=%.1f MWe, PWM=%d/255, Pumps: P=%d S=%d T=%d",
+                         self.esp_e_data.power_mwe, self.esp_e_data.pwm,
+                         response_data['pump_primary'], response_data['pump_secondary'],
+                         response_data['pump_tertiary'])
             return True
         
         else:
@@ -1199,6 +1208,13 @@ class UARTMaster:
             self.esp_e.disconnect()
         
         logger.info("✅ UART Master closed")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
 
 
 # Test function
@@ -1210,40 +1226,32 @@ if __name__ == "__main__":
     print("="*70)
     
     try:
-        # Initialize (ESP-E disabled)
-        master = UARTMaster(esp_bc_port='/dev/ttyAMA0', esp_e_port=None)
-        
-        # Wait for ESP to be fully ready
-        print("\n⏳ Waiting 1 second for ESP32 to stabilize...")
-        time.sleep(1.0)
-        
-        # Test ESP-BC
-        print("\n[TEST] ESP-BC Communication...")
-        success = master.update_esp_bc(
-            safety=50, shim=60, regulating=70,
-            pump_primary=2, pump_secondary=2, pump_tertiary=1,
-            humid_ct1=1, humid_ct2=0, humid_ct3=1, humid_ct4=0
-        )
-        
-        if success:
-            data = master.get_esp_bc_data()
-            print(f"  ✅ Rod positions: {data.safety_actual}, {data.shim_actual}, {data.regulating_actual}")
-            print(f"  ✅ Thermal power: {data.kw_thermal} kW")
-            print(f"  ✅ Turbine power: {data.power_level}%")
-            print(f"  ✅ Turbine speed: {data.turbine_speed}%")
-            print(f"  ✅ Pump speeds: Primary={data.pump_primary_speed}%, Secondary={data.pump_secondary_speed}%, Tertiary={data.pump_tertiary_speed}%")
-            print(f"  ✅ Turbine state: {data.state} (0=IDLE, 1=STARTING, 2=RUNNING, 3=SHUTDOWN)")
-        else:
-            print("  ❌ Failed to communicate with ESP-BC")
-        
-        # Health check
-        print("\n[TEST] Health Status:")
-        health = master.get_health_status()
-        for esp, info in health.items():
-            print(f"  {esp.upper()}: {info['status']} (errors: {info['error_count']})")
-        
-        # Close
-        master.close()
+        # Initialize (ESP-E disabled) - ports are closed on exit even if a test fails
+        with UARTMaster(esp_bc_port='/dev/ttyAMA0', esp_e_port=None) as master:
+            # Test ESP-BC
+            print("\n[TEST] ESP-BC Communication...")
+            success = master.update_esp_bc(
+                safety=50, shim=60, regulating=70,
+                pump_primary=2, pump_secondary=2, pump_tertiary=1,
+                humid_ct1=1, humid_ct2=0, humid_ct3=1, humid_ct4=0
+            )
+            
+            if success:
+                data = master.get_esp_bc_data()
+                print(f"  ✅ Rod positions: {data.safety_actual}, {data.shim_actual}, {data.regulating_actual}")
+                print(f"  ✅ Thermal power: {data.kw_thermal} kW")
+                print(f"  ✅ Turbine power: {data.power_level}%")
+                print(f"  ✅ Turbine speed: {data.turbine_speed}%")
+                print(f"  ✅ Pump speeds: Primary={data.pump_primary_speed}%, Secondary={data.pump_secondary_speed}%, Tertiary={data.pump_tertiary_speed}%")
+                print(f"  ✅ Turbine state: {data.state} (0=IDLE, 1=STARTING, 2=RUNNING, 3=SHUTDOWN)")
+            else:
+                print("  ❌ Failed to communicate with ESP-BC")
+            
+            # Health check
+            print("\n[TEST] Health Status:")
+            health = master.get_health_status()
+            for esp, info in health.items():
+                print(f"  {esp.upper()}: {info['status']} (errors: {info['error_count']})")
         
         print("\n" + "="*70)
         print("✅ Test complete")